@@ -1,39 +1,45 @@
-from flask import Flask, request, render_template
-from src.Heart.pipeline.Prediction_pipeline import CustomData, PredictPipeline
+import os
+from flask import Flask, Response, request, render_template, jsonify
+from src.Heart.pipeline.micro_batcher import MicroBatcher
+from src.Heart.pipeline.Prediction_pipeline import CustomData, PredictPipeline, parse_batch_payload
+from src.Heart.utils.metrics import REGISTRY, CONTENT_TYPE, REQUESTS, ERRORS, STAGE_SECONDS, register_serving_collectors
+
+MAX_BATCH_SIZE = 10000
+
+PARSE_SECONDS = STAGE_SECONDS.labels('parse')
+CUSTOM_DATA_SECONDS = STAGE_SECONDS.labels('custom_data')
+RENDER_SECONDS = STAGE_SECONDS.labels('render')
 
 app = Flask(__name__)
 
+# Artifacts are loaded once per process and shared by every request
+predict_pipeline = PredictPipeline()
+# Coalesces concurrent single-patient requests into one model call
+micro_batcher = MicroBatcher(predict_pipeline)
+register_serving_collectors(predict_pipeline)
+
 # Define the home route
 @app.route("/", methods=["GET", "POST"])
 def home():
     if request.method == "POST":
+        REQUESTS.labels("/").inc()
         try:
-            # Validate and convert form data to CustomData object
-            data = CustomData(
-                age=request.form.get("age"),
-                sex=request.form.get("sex"),
-                cp=(request.form.get("cp")),
-                trestbps=(request.form.get("trestbps")),
-                chol=(request.form.get("chol")),
-                fbs=request.form.get("fbs"),
-                restecg=request.form.get("restecg"),
-                thalach=(request.form.get("thalach")),
-                exang=request.form.get("exang"),
-                oldpeak=request.form.get("oldpeak"),
-                slope=request.form.get("slope"),
-                ca=request.form.get("ca"),
-                thal=(request.form.get("thal"))
-            )
-
-            final_data = data.get_data_as_dataframe()
+            with PARSE_SECONDS.time():
+                form = request.form
+
+            # Validate and convert form data straight into a feature row
+            with CUSTOM_DATA_SECONDS.time():
+                data = CustomData.from_mapping(form)
+
             # Make prediction
-            predict_pipeline = PredictPipeline()
-            pred = predict_pipeline.predict(final_data)
+            pred = micro_batcher.predict(data.get_data_as_array())
             result = round(pred[0], 2)
-            return render_template("result.html", final_result=result)
+            with RENDER_SECONDS.time():
+                return render_template("result.html", final_result=result)
 
         except Exception as e:
             # Handle exceptions gracefully
+            ERRORS.labels("/").inc()
             error_message = f"Error during prediction: {str(e)}"
             return render_template("error.html", error_message=error_message)
 
@@ -41,6 +47,62 @@ def home():
         # Render the initial page
         return render_template("index.html")
 
+# Score one patient sent as a JSON object
+@app.route("/predict", methods=["POST"])
+def predict():
+    REQUESTS.labels("/predict").inc()
+    try:
+        with PARSE_SECONDS.time():
+            payload = request.get_json(force=True)
+        with CUSTOM_DATA_SECONDS.time():
+            data = CustomData.from_mapping(payload)
+    except Exception as e:
+        ERRORS.labels("/predict").inc()
+        return jsonify(error=f"Malformed request body: {str(e)}"), 400
+
+    try:
+        pred = micro_batcher.predict(data.get_data_as_array())
+        return jsonify(prediction=int(pred[0]))
+    except Exception as e:
+        ERRORS.labels("/predict").inc()
+        return jsonify(error=f"Error during prediction: {str(e)}"), 500
+
+# Score many patients in one request (JSON array or NDJSON body)
+@app.route("/predict/batch", methods=["POST"])
+def predict_batch():
+    REQUESTS.labels("/predict/batch").inc()
+    try:
+        with PARSE_SECONDS.time():
+            records = parse_batch_payload(request.get_data())
+    except ValueError as e:
+        ERRORS.labels("/predict/batch").inc()
+        return jsonify(error=f"Malformed request body: {str(e)}"), 400
+
+    if len(records) > MAX_BATCH_SIZE:
+        ERRORS.labels("/predict/batch").inc()
+        return jsonify(error=f"Batch exceeds {MAX_BATCH_SIZE} records"), 413
+
+    try:
+        return jsonify(predict_pipeline.predict_batch(records))
+    except Exception as e:
+        ERRORS.labels("/predict/batch").inc()
+        return jsonify(error=f"Error during prediction: {str(e)}"), 500
+
+@app.route("/batcher/stats", methods=["GET"])
+def batcher_stats():
+    return jsonify(micro_batcher.stats())
+
+@app.route("/cache/stats", methods=["GET"])
+def cache_stats():
+    cache = predict_pipeline.result_cache
+    return jsonify(cache.stats() if cache is not None else {"enabled": False})
+
+# Prometheus scrape endpoint
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    return Response(REGISTRY.render(), content_type=CONTENT_TYPE)
+
 # Execution begins
 if __name__ == '__main__':
-    app.run(host="0.0.0.0", port=8080, debug=True)
+    # The debugger runs arbitrary code from the browser; only turn it on locally
+    app.run(host="0.0.0.0", port=8080, debug=os.environ.get("HEART_DEBUG", "0") == "1")
@@ -0,0 +1,153 @@
+import os
+import asyncio
+import contextlib
+from jinja2 import pass_context
+from concurrent.futures import ThreadPoolExecutor
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Mount, Route
+from starlette.staticfiles import StaticFiles
+from starlette.templating import Jinja2Templates
+from src.Heart.pipeline.micro_batcher import MicroBatcher
+from src.Heart.pipeline.Prediction_pipeline import CustomData, PredictPipeline, parse_batch_payload
+from src.Heart.utils.metrics import REGISTRY, CONTENT_TYPE, REQUESTS, ERRORS, STAGE_SECONDS, register_serving_collectors
+
+MAX_BATCH_SIZE = 10000
+# Bounded pool for the CPU-bound model work; the event loop only does I/O
+PREDICT_WORKERS = int(os.environ.get('HEART_PREDICT_WORKERS', min(32, (os.cpu_count() or 1) + 4)))
+
+PARSE_SECONDS = STAGE_SECONDS.labels('parse')
+CUSTOM_DATA_SECONDS = STAGE_SECONDS.labels('custom_data')
+RENDER_SECONDS = STAGE_SECONDS.labels('render')
+
+templates = Jinja2Templates(directory="templates")
+predict_pipeline = PredictPipeline()
+micro_batcher = MicroBatcher(predict_pipeline)
+register_serving_collectors(predict_pipeline)
+executor = ThreadPoolExecutor(max_workers=PREDICT_WORKERS, thread_name_prefix="heart-predict")
+
+
+# The templates are shared with the Flask app and call url_for('static', filename=...)
+@pass_context
+def url_for(context, name, **path_params):
+    if "filename" in path_params:
+        path_params["path"] = path_params.pop("filename")
+    return context["request"].url_for(name, **path_params)
+
+templates.env.globals["url_for"] = url_for
+
+
+async def run_in_executor(func, *args):
+    return await asyncio.get_running_loop().run_in_executor(executor, func, *args)
+
+
+async def home(request):
+    if request.method == "POST":
+        REQUESTS.labels("/").inc()
+        try:
+            with PARSE_SECONDS.time():
+                form = await request.form()
+            with CUSTOM_DATA_SECONDS.time():
+                data = CustomData.from_mapping(form)
+            pred = await run_in_executor(micro_batcher.predict, data.get_data_as_array())
+            result = round(pred[0], 2)
+            with RENDER_SECONDS.time():
+                return templates.TemplateResponse(request, "result.html", {"final_result": result})
+
+        except Exception as e:
+            ERRORS.labels("/").inc()
+            error_message = f"Error during prediction: {str(e)}"
+            return templates.TemplateResponse(request, "error.html", {"error_message": error_message})
+
+    return templates.TemplateResponse(request, "index.html")
+
+
+async def predict(request):
+    REQUESTS.labels("/predict").inc()
+    try:
+        with PARSE_SECONDS.time():
+            payload = await request.json()
+        with CUSTOM_DATA_SECONDS.time():
+            data = CustomData.from_mapping(payload)
+    except Exception as e:
+        ERRORS.labels("/predict").inc()
+        return JSONResponse({"error": f"Malformed request body: {str(e)}"}, status_code=400)
+
+    try:
+        pred = await run_in_executor(micro_batcher.predict, data.get_data_as_array())
+        return JSONResponse({"prediction": int(pred[0])})
+    except Exception as e:
+        ERRORS.labels("/predict").inc()
+        return JSONResponse({"error": f"Error during prediction: {str(e)}"}, status_code=500)
+
+
+async def predict_batch(request):
+    REQUESTS.labels("/predict/batch").inc()
+    try:
+        body = await request.body()
+        with PARSE_SECONDS.time():
+            records = parse_batch_payload(body)
+    except ValueError as e:
+        ERRORS.labels("/predict/batch").inc()
+        return JSONResponse({"error": f"Malformed request body: {str(e)}"}, status_code=400)
+
+    if len(records) > MAX_BATCH_SIZE:
+        ERRORS.labels("/predict/batch").inc()
+        return JSONResponse({"error": f"Batch exceeds {MAX_BATCH_SIZE} records"}, status_code=413)
+
+    try:
+        return JSONResponse(await run_in_executor(predict_pipeline.predict_batch, records))
+    except Exception as e:
+        ERRORS.labels("/predict/batch").inc()
+        return JSONResponse({"error": f"Error during prediction: {str(e)}"}, status_code=500)
+
+
+async def batcher_stats(request):
+    return JSONResponse(micro_batcher.stats())
+
+
+async def cache_stats(request):
+    cache = predict_pipeline.result_cache
+    return JSONResponse(cache.stats() if cache is not None else {"enabled": False})
+
+
+async def metrics(request):
+    return Response(REGISTRY.render(), media_type=CONTENT_TYPE)
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app):
+    # Load the artifacts before the first request is accepted
+    await run_in_executor(predict_pipeline.artifact_cache.get)
+    yield
+    # Runs after the server has stopped accepting connections and drained
+    # in-flight requests; let queued predictions finish before exiting.
+    executor.shutdown(wait=True)
+
+
+app = Starlette(
+    routes=[
+        Route("/", home, methods=["GET", "POST"]),
+        Route("/predict", predict, methods=["POST"]),
+        Route("/predict/batch", predict_batch, methods=["POST"]),
+        Route("/batcher/stats", batcher_stats, methods=["GET"]),
+        Route("/cache/stats", cache_stats, methods=["GET"]),
+        Route("/metrics", metrics, methods=["GET"]),
+        Mount("/static", app=StaticFiles(directory="static"), name="static"),
+    ],
+    lifespan=lifespan,
+)
+
+# Execution begins
+if __name__ == '__main__':
+    import uvicorn
+
+    uvicorn.run(
+        "asgi_app:app",
+        host=os.environ.get("HOST", "0.0.0.0"),
+        port=int(os.environ.get("PORT", 8080)),
+        workers=int(os.environ.get("WEB_CONCURRENCY", 1)),
+        timeout_keep_alive=int(os.environ.get("HEART_KEEP_ALIVE", 5)),
+        timeout_graceful_shutdown=int(os.environ.get("HEART_GRACEFUL_SHUTDOWN", 30)),
+        access_log=False,
+    )
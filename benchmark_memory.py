@@ -0,0 +1,119 @@
+import os
+import sys
+import json
+import shutil
+import argparse
+import tempfile
+
+# Peak-RSS comparison of the train/test handoff between DataTransformation and
+# the training stages: the previous np.c_[X, y] arrays that ModelTrainer sliced
+# apart again, against the Dataset objects (separate X/y buffers, X transformed
+# in place in a preallocated memory map, preprocessor fitted column by column).
+# Each variant runs in its own forked process on the same synthetic splits and
+# ends with the same LogisticRegression fit and test predictions. POSIX only.
+#
+#   python benchmark_memory.py --sizes 1e5,1e6,5e6 --output memory_results.json
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from benchmark_training import run_isolated, write_synthetic_csv
+
+
+def _consume(X_train, y_train, X_test, y_test):
+    # What every candidate in ModelTrainer does with the handoff
+    from sklearn.linear_model import LogisticRegression
+
+    model = LogisticRegression(max_iter=100).fit(X_train, y_train)
+    return float((model.predict(X_test) == y_test).mean())
+
+
+def concatenated_handoff(train_path, test_path):
+    # The pipeline before Dataset: ColumnTransformer fitted on a DataFrame, np.c_
+    # with the target, then [:, :-1] / [:, -1] slices in the trainer
+    import numpy as np
+    import pandas as pd
+    from src.Heart.utils.split_store import load_columns
+    from src.Heart.utils.schema import FEATURE_COLUMNS, TARGET_COLUMN, TRAINING_DTYPE, to_float
+    from src.Heart.components.Data_transformation import DataTransformation
+
+    columns = FEATURE_COLUMNS + [TARGET_COLUMN]
+    train_columns, test_columns = load_columns(train_path, columns), load_columns(test_path, columns)
+    preprocessor = DataTransformation().get_data_transformation()
+    X_train = preprocessor.fit_transform(pd.DataFrame(to_float(train_columns), columns=FEATURE_COLUMNS))
+    X_test = preprocessor.transform(pd.DataFrame(to_float(test_columns), columns=FEATURE_COLUMNS))
+    train_array = np.c_[X_train, np.array(train_columns[TARGET_COLUMN], dtype=TRAINING_DTYPE)]
+    test_array = np.c_[X_test, np.array(test_columns[TARGET_COLUMN], dtype=TRAINING_DTYPE)]
+    return _consume(train_array[:, :-1], train_array[:, -1], test_array[:, :-1], test_array[:, -1])
+
+
+def dataset_handoff(train_path, test_path):
+    from src.Heart.components.Data_transformation import DataTransformation
+
+    train, test, _ = DataTransformation().initialize_data_transformation(train_path, test_path)
+    return _consume(train.X, train.y, test.X, test.y)
+
+
+HANDOFFS = {'concatenated': concatenated_handoff, 'dataset': dataset_handoff}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Compare peak RSS of the np.c_ and Dataset train/test handoffs.')
+    parser.add_argument('--sizes', default='1e5,1e6', help='comma-separated row counts, e.g. 1e5,1e6,5e6')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--workdir', default=None, help='where data and artifacts are written (default: a temp dir)')
+    parser.add_argument('--output', default=None, help='also write the results to this JSON file')
+    args = parser.parse_args(argv)
+
+    sizes = [int(float(size)) for size in args.sizes.split(',')]
+    workdir = os.path.abspath(args.workdir or tempfile.mkdtemp(prefix='heart_memory_'))
+    os.makedirs(workdir, exist_ok=True)
+    output_path = os.path.abspath(args.output) if args.output else None
+
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    results = []
+    try:
+        from src.Heart.components.Data_ingestion import DataIngestion, DataIngestionConfig
+
+        config = DataIngestionConfig()
+        # RSS of a forked child that does nothing: interpreter plus imports
+        idle_rss = run_isolated(lambda: None)[3]
+        for rows in sizes:
+            source_path = os.path.join(workdir, 'synthetic.csv')
+            for stage, fn in (('generate', lambda: write_synthetic_csv(source_path, rows, args.seed)),
+                              ('ingestion', lambda: DataIngestion().initiate_data_ingestion(source_path))):
+                status, value, _, _ = run_isolated(fn)
+                if status != 'ok':
+                    raise RuntimeError(f'{stage} failed at {rows} rows: {value}')
+
+            print(f'{rows:,} rows')
+            for name, handoff in HANDOFFS.items():
+                status, value, seconds, peak_rss = run_isolated(lambda: handoff(config.train_data_path, config.test_data_path))
+                result = {
+                    'rows': rows, 'handoff': name, 'status': status,
+                    'seconds': None if seconds is None else round(seconds, 3),
+                    'peak_rss_mb': round(peak_rss, 1), 'rss_over_idle_mb': round(peak_rss - idle_rss, 1),
+                    'accuracy': value if status == 'ok' else None, 'error': value if status != 'ok' else None,
+                }
+                results.append(result)
+                print(f"  {name:<13} peak RSS {result['peak_rss_mb']:>8} MB  (+{result['rss_over_idle_mb']} MB)  "
+                      f"{result['seconds']}s  {status}")
+
+            before, after = results[-2], results[-1]
+            if before['status'] == after['status'] == 'ok' and before['rss_over_idle_mb'] > 0:
+                saved = 1 - after['rss_over_idle_mb'] / before['rss_over_idle_mb']
+                print(f'  dataset handoff uses {saved:.0%} less memory above idle')
+    finally:
+        os.chdir(cwd)
+        if not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    if output_path:
+        with open(output_path, 'w') as file_obj:
+            json.dump({'idle_rss_mb': round(idle_rss, 1), 'results': results}, file_obj, indent=2)
+        print(f'Results written to {output_path}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,296 @@
+import os
+import sys
+import json
+import time
+import pickle
+import select
+import shutil
+import signal
+import argparse
+import platform
+import resource
+import tempfile
+import numpy as np
+
+# Scaling benchmark for the training pipeline. Synthetic patients with the
+# 13-feature schema are generated at each size, then ingestion, transformation
+# and every ModelTrainer candidate are run in a forked child process so each
+# measurement gets its own wall time, peak RSS and timeout. POSIX only.
+#
+#   python benchmark_training.py --sizes 1e3,1e4,1e5 --output benchmark_results.json
+#   python benchmark_training.py --sizes 1e3,1e4,1e5,1e6,1e7 --model-timeout 900
+#   python benchmark_training.py --sizes 1e3,1e4 --baseline benchmark_baseline.json --threshold 0.25
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from src.Heart.utils.schema import FEATURE_COLUMNS, TARGET_COLUMN
+
+# (kind, parameters) per column, roughly matching the UCI heart data
+COLUMN_DISTRIBUTIONS = {
+    'age': ('normal', 54.4, 9.0, 29, 77),
+    'sex': ('choice', [0, 1], [0.32, 0.68]),
+    'cp': ('choice', [1, 2, 3, 4], [0.08, 0.17, 0.28, 0.47]),
+    'trestbps': ('normal', 131.7, 17.6, 94, 200),
+    'chol': ('normal', 246.7, 51.8, 126, 564),
+    'fbs': ('choice', [0, 1], [0.85, 0.15]),
+    'restecg': ('choice', [0, 1, 2], [0.50, 0.01, 0.49]),
+    'thalach': ('normal', 149.6, 22.9, 71, 202),
+    'exang': ('choice', [0, 1], [0.67, 0.33]),
+    'oldpeak': ('exponential', 1.04, 0.0, 6.2),
+    'slope': ('choice', [1, 2, 3], [0.47, 0.46, 0.07]),
+    'ca': ('choice', [0, 1, 2, 3], [0.59, 0.22, 0.13, 0.06]),
+    'thal': ('choice', [3, 6, 7], [0.55, 0.06, 0.39]),
+}
+# Fraction of cells left empty in these columns so the imputer has work to do
+MISSING_FRACTION = {'ca': 0.01, 'thal': 0.01}
+
+
+def synthetic_chunk(rows, rng):
+    columns = {}
+    for column in FEATURE_COLUMNS:
+        spec = COLUMN_DISTRIBUTIONS[column]
+        if spec[0] == 'normal':
+            values = np.clip(np.round(rng.normal(spec[1], spec[2], rows)), spec[3], spec[4])
+        elif spec[0] == 'exponential':
+            values = np.clip(np.round(rng.exponential(spec[1], rows), 1), spec[2], spec[3])
+        else:
+            values = rng.choice(spec[1], size=rows, p=spec[2]).astype(np.float64)
+        columns[column] = values
+    # The label follows a noisy logistic model of the usual risk factors
+    logit = (0.05 * (columns['age'] - 54) + 0.8 * columns['sex'] + 0.6 * (columns['cp'] == 4)
+             - 0.03 * (columns['thalach'] - 150) + 0.9 * columns['exang'] + 0.6 * columns['oldpeak']
+             + 0.7 * columns['ca'] + 0.8 * (columns['thal'] == 7) - 2.2)
+    columns[TARGET_COLUMN] = (rng.random(rows) < 1.0 / (1.0 + np.exp(-logit))).astype(np.int64)
+    for column, fraction in MISSING_FRACTION.items():
+        columns[column][rng.random(rows) < fraction] = np.nan
+    return columns
+
+
+def write_synthetic_csv(path, rows, seed, chunk_rows=1_000_000):
+    import pandas as pd
+
+    rng = np.random.default_rng(seed)
+    written = 0
+    with open(path, 'w') as file_obj:
+        while written < rows:
+            chunk = pd.DataFrame(synthetic_chunk(min(chunk_rows, rows - written), rng))
+            chunk.to_csv(file_obj, header=written == 0, index=False)
+            written += len(chunk)
+    return {'rows': written, 'file_bytes': os.path.getsize(path)}
+
+
+def _rss_mb():
+    try:
+        with open('/proc/self/statm') as file_obj:
+            return int(file_obj.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2**20
+    except (OSError, ValueError):
+        return None
+
+
+def run_isolated(fn, timeout=None):
+    # Runs fn() in a forked child and returns (status, value, seconds, peak RSS in MB).
+    # wait4() reports the child's own high-water mark, so every stage and model
+    # is measured from a fresh process rather than the benchmark's running maximum.
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(read_fd)
+        try:
+            start = time.perf_counter()
+            value = fn()
+            outcome = ('ok', value, time.perf_counter() - start)
+        except BaseException as e:
+            outcome = ('failed', f'{type(e).__name__}: {e}', None)
+        with os.fdopen(write_fd, 'wb') as file_obj:
+            pickle.dump(outcome, file_obj)
+        os._exit(0)
+
+    os.close(write_fd)
+    chunks = []
+    deadline = time.monotonic() + timeout if timeout else None
+    with os.fdopen(read_fd, 'rb') as file_obj:
+        while True:
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                os.kill(pid, signal.SIGKILL)
+                outcome = ('timeout', f'exceeded {timeout}s', None)
+                break
+            ready, _, _ = select.select([file_obj], [], [], remaining)
+            if ready:
+                data = os.read(file_obj.fileno(), 1 << 20)
+                if not data:
+                    outcome = pickle.loads(b''.join(chunks)) if chunks else ('failed', 'child exited without a result', None)
+                    break
+                chunks.append(data)
+    _, status, usage = os.wait4(pid, 0)
+    if outcome[0] == 'failed' and not chunks and os.WIFSIGNALED(status):
+        outcome = ('failed', f'killed by signal {os.WTERMSIG(status)}', None)
+    # ru_maxrss is in KiB on Linux and bytes on macOS
+    peak_rss_mb = usage.ru_maxrss / (2**20 if sys.platform == 'darwin' else 2**10)
+    return outcome[0], outcome[1], outcome[2], peak_rss_mb
+
+
+def benchmark_size(rows, workdir, models, seed, model_timeout, skip_models):
+    from src.Heart.components.Data_ingestion import DataIngestion, DataIngestionConfig
+    from src.Heart.components.Data_transformation import DataTransformationConfig
+
+    results = []
+    baseline_rss = _rss_mb()
+
+    def record(stage, model, outcome, extra=None):
+        status, value, seconds, peak_rss = outcome
+        entry = {
+            'rows': rows, 'stage': stage, 'model': model, 'status': status,
+            'seconds': None if seconds is None else round(seconds, 4),
+            'peak_rss_mb': round(peak_rss, 1),
+            'rss_delta_mb': None if baseline_rss is None else round(peak_rss - baseline_rss, 1),
+            'error': value if status != 'ok' else None,
+        }
+        entry.update(extra or {})
+        results.append(entry)
+        label = f'{stage}:{model}' if model else stage
+        timing = f"{entry['seconds']}s" if entry['seconds'] is not None else status
+        print(f"  {rows:>10,} rows  {label:<40} {timing:>12}  peak RSS {entry['peak_rss_mb']} MB", flush=True)
+        return entry
+
+    source_path = os.path.join(workdir, 'synthetic.csv')
+    outcome = run_isolated(lambda: write_synthetic_csv(source_path, rows, seed))
+    record('generate', None, outcome, outcome[1] if outcome[0] == 'ok' else None)
+    if outcome[0] != 'ok':
+        return results
+
+    config = DataIngestionConfig()
+    transformation_config = DataTransformationConfig()
+    if record('ingestion', None, run_isolated(lambda: DataIngestion().initiate_data_ingestion(source_path)))['status'] != 'ok':
+        return results
+
+    def transform():
+        from src.Heart.components.Data_transformation import DataTransformation
+
+        # Saves the transformed datasets as .npy, which the model stages memory-map
+        DataTransformation().initialize_data_transformation(config.train_data_path, config.test_data_path)
+
+    if record('transformation', None, run_isolated(transform))['status'] != 'ok':
+        return results
+
+    for model_name in models:
+        if model_name in skip_models:
+            results.append({'rows': rows, 'stage': 'model', 'model': model_name, 'status': 'skipped',
+                            'seconds': None, 'peak_rss_mb': None, 'rss_delta_mb': None,
+                            'error': 'timed out at a smaller size'})
+            continue
+
+        def train_one(model_name=model_name):
+            from src.Heart.utils.utils import fit_and_score
+            from src.Heart.components.Model_trainer import get_candidate_models
+
+            from src.Heart.utils.dataset import Dataset
+
+            train = Dataset.load(transformation_config.train_dataset_dir_path)
+            test = Dataset.load(transformation_config.test_dataset_dir_path)
+            result = fit_and_score(get_candidate_models()[model_name], train.X, train.y, test.X, test.y,
+                                   threads=os.cpu_count() or 1)
+            return {key: result[key] for key in ('accuracy', 'fit_seconds', 'predict_seconds')}
+
+        outcome = run_isolated(train_one, model_timeout)
+        extra = {key: round(value, 4) for key, value in outcome[1].items()} if outcome[0] == 'ok' else None
+        if record('model', model_name, outcome, extra)['status'] == 'timeout':
+            skip_models.add(model_name)
+    return results
+
+
+def compare_to_baseline(results, baseline, threshold, min_seconds=0.05):
+    # A regression is a stage/model that got slower or bigger than the baseline by
+    # more than threshold, or that used to finish and now does not
+    previous = {(r['rows'], r['stage'], r['model']): r for r in baseline['results']}
+    regressions = []
+    for result in results:
+        before = previous.get((result['rows'], result['stage'], result['model']))
+        if before is None or before['status'] != 'ok':
+            continue
+        label = f"{result['stage']}{':' + result['model'] if result['model'] else ''} @ {result['rows']:,} rows"
+        if result['status'] != 'ok':
+            regressions.append(f"{label}: {result['status']} (baseline ok)")
+            continue
+        # Very short timings are mostly noise
+        if max(result['seconds'], before['seconds']) >= min_seconds and result['seconds'] > before['seconds'] * (1 + threshold):
+            regressions.append(f"{label}: {result['seconds']}s > baseline {before['seconds']}s")
+        if result['rss_delta_mb'] is not None and before.get('rss_delta_mb') is not None:
+            if result['rss_delta_mb'] > max(before['rss_delta_mb'], 1.0) * (1 + threshold) + 16:
+                regressions.append(f"{label}: {result['rss_delta_mb']} MB > baseline {before['rss_delta_mb']} MB")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark how the training pipeline scales with data size.')
+    parser.add_argument('--sizes', default='1e3,1e4,1e5', help='comma-separated row counts, e.g. 1e3,1e4,1e5,1e6,1e7')
+    parser.add_argument('--models', default=None, help='comma-separated ModelTrainer candidate names (default: all)')
+    parser.add_argument('--model-timeout', type=float, default=600.0,
+                        help='seconds per model; a model that times out is skipped at larger sizes')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--workdir', default=None, help='where data and artifacts are written (default: a temp dir)')
+    parser.add_argument('--output', default='benchmark_results.json')
+    parser.add_argument('--save-baseline', help='also write the results to this JSON file')
+    parser.add_argument('--baseline', help='compare against this JSON baseline and exit 1 on regression')
+    parser.add_argument('--threshold', type=float, default=0.25, help='allowed relative regression, e.g. 0.25 = 25%%')
+    args = parser.parse_args(argv)
+
+    from src.Heart.components.Model_trainer import get_candidate_models
+
+    sizes = [int(float(size)) for size in args.sizes.split(',')]
+    models = args.models.split(',') if args.models else list(get_candidate_models())
+    workdir = os.path.abspath(args.workdir or tempfile.mkdtemp(prefix='heart_benchmark_'))
+    os.makedirs(workdir, exist_ok=True)
+    output_path = os.path.abspath(args.output)
+
+    import sklearn
+    meta = {
+        'timestamp': time.time(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'sklearn': sklearn.__version__,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'seed': args.seed,
+        'sizes': sizes,
+    }
+
+    # Pipeline components write to relative Artifacts/ paths; keep them out of the repo
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    results = []
+    skip_models = set()
+    try:
+        for rows in sizes:
+            print(f'Benchmarking {rows:,} rows in {workdir}', flush=True)
+            results.extend(benchmark_size(rows, workdir, models, args.seed, args.model_timeout, skip_models))
+    finally:
+        os.chdir(cwd)
+        # A temp workdir holds gigabytes of CSV at the larger sizes
+        if not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {'meta': meta, 'results': results}
+    with open(output_path, 'w') as file_obj:
+        json.dump(report, file_obj, indent=2)
+    print(f'Results written to {output_path}')
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as file_obj:
+            json.dump(report, file_obj, indent=2)
+        print(f'Baseline saved to {args.save_baseline}')
+
+    if args.baseline:
+        with open(args.baseline) as file_obj:
+            baseline = json.load(file_obj)
+        regressions = compare_to_baseline(results, baseline, args.threshold)
+        if regressions:
+            print('PERFORMANCE REGRESSION:')
+            for regression in regressions:
+                print(f'  - {regression}')
+            return 1
+        print(f'Within {args.threshold:.0%} of baseline')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
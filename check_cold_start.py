@@ -0,0 +1,90 @@
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+# Cold-start budget check for the serving entry points. Each run starts a fresh
+# interpreter, imports the app, makes the first prediction and reports which
+# heavy packages got loaded along the way. Exits 1 when a budget is exceeded.
+#
+#   python check_cold_start.py
+#   HEART_MODEL_FORMAT=arrays python check_cold_start.py --entry-point asgi_app --budget 0.5
+
+# Training/analysis packages that importing the serving app must never pull in
+TRAINING_ONLY_MODULES = ['sklearn', 'scipy', 'pandas', 'xgboost', 'catboost', 'mlflow', 'pyarrow']
+
+PROBE = '''
+import sys, json, time
+start = time.perf_counter()
+import {entry_point} as serving_app
+imported = time.perf_counter()
+loaded_by_import = sorted({{name.split('.')[0] for name in sys.modules}})
+import numpy as np
+serving_app.predict_pipeline.predict_array(np.zeros((1, 13)))
+first_prediction = time.perf_counter()
+print(json.dumps({{
+    'import_seconds': imported - start,
+    'first_prediction_seconds': first_prediction - imported,
+    'total_seconds': first_prediction - start,
+    'loaded_by_import': loaded_by_import,
+    'loaded_by_prediction': sorted({{name.split('.')[0] for name in sys.modules}}),
+}}))
+'''
+
+
+def probe(entry_point):
+    env = dict(os.environ, HEART_RESULT_CACHE_SIZE='0')
+    completed = subprocess.run(
+        [sys.executable, '-c', PROBE.format(entry_point=entry_point)],
+        capture_output=True, text=True, env=env, cwd=os.path.dirname(os.path.abspath(__file__)))
+    if completed.returncode != 0:
+        raise RuntimeError(f'{entry_point} failed to start:\n{completed.stderr}')
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Check serving cold start against a time budget.')
+    parser.add_argument('--entry-point', default='app', help='module to import: app or asgi_app')
+    parser.add_argument('--budget', type=float, default=float(os.environ.get('HEART_COLD_START_BUDGET', 3.0)),
+                        help='max seconds from interpreter start to the first prediction')
+    parser.add_argument('--import-budget', type=float, default=1.0, help='max seconds to import the entry point')
+    parser.add_argument('--runs', type=int, default=3, help='the median of this many runs is compared')
+    args = parser.parse_args(argv)
+
+    runs = [probe(args.entry_point) for _ in range(args.runs)]
+    result = {
+        'entry_point': args.entry_point,
+        'model_format': os.environ.get('HEART_MODEL_FORMAT', 'bundle'),
+        'import_seconds': round(statistics.median(r['import_seconds'] for r in runs), 4),
+        'first_prediction_seconds': round(statistics.median(r['first_prediction_seconds'] for r in runs), 4),
+        'total_seconds': round(statistics.median(r['total_seconds'] for r in runs), 4),
+    }
+    print(json.dumps(result, indent=2))
+
+    failures = []
+    if result['import_seconds'] > args.import_budget:
+        failures.append(f"import took {result['import_seconds']}s (budget {args.import_budget}s)")
+    if result['total_seconds'] > args.budget:
+        failures.append(f"first prediction after {result['total_seconds']}s (budget {args.budget}s)")
+    leaked = sorted(set(TRAINING_ONLY_MODULES) & set(runs[0]['loaded_by_import']))
+    if leaked:
+        failures.append(f'importing {args.entry_point} loaded {leaked}')
+    if result['model_format'] == 'arrays':
+        # Pickle-free artifacts need nothing beyond numpy at prediction time either
+        leaked = sorted(set(TRAINING_ONLY_MODULES) & set(runs[0]['loaded_by_prediction']))
+        if leaked:
+            failures.append(f'first prediction loaded {leaked}')
+
+    if failures:
+        print('COLD START BUDGET EXCEEDED:')
+        for failure in failures:
+            print(f'  - {failure}')
+        return 1
+    print('Cold start within budget')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
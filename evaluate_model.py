@@ -1,40 +1,32 @@
 import pandas as pd
-import pickle
 import numpy as np
 from sklearn.metrics import accuracy_score, classification_report, confusion_matrix
-from src.Heart.components.Data_ingestion import DataIngestion
-from src.Heart.components.Data_transformation import DataTransformation
+from src.Heart.components.Data_ingestion import DataIngestionConfig
+from src.Heart.utils.schema import FEATURE_COLUMNS, TARGET_COLUMN, to_float
+from src.Heart.utils.split_store import read_split
+from src.Heart.utils.inference_bundle import load_bundle
 
 print("="*70)
 print("MODEL PERFORMANCE EVALUATION")
 print("="*70)
 
-# Load the trained model
-model_path = 'Artifacts/Model.pkl'
-with open(model_path, 'rb') as f:
-    model = pickle.load(f)
+# Load the preprocessor and model trained together
+bundle_path = 'Artifacts/Inference_bundle.bin'
+bundle = load_bundle(bundle_path)
+model, preprocessor = bundle.model, bundle.preprocessor
 
 print(f"\n✓ Loaded model: {type(model).__name__}")
-
-# Load preprocessor
-preprocessor_path = 'Artifacts/Preprocessor.pkl'
-with open(preprocessor_path, 'rb') as f:
-    preprocessor = pickle.load(f)
-
 print(f"✓ Loaded preprocessor")
+print(f"✓ Bundle created {bundle.header['created_at']} from {bundle.metadata['training_data']['rows']} training rows")
 
-# Get the test data
+# Load the test split written by the training pipeline (only the columns used here)
 print("\nLoading test data...")
-obj = DataIngestion()
-train_data_path, test_data_path = obj.initiate_data_ingestion()
-
-# Load and transform test data
-test_df = pd.read_csv(test_data_path)
+test_df = read_split(DataIngestionConfig.test_data_path, FEATURE_COLUMNS + [TARGET_COLUMN])
 print(f"✓ Test data shape: {test_df.shape}")
 
 # Separate features and target
-X_test = test_df.drop(columns=['target'], axis=1)
-y_test = test_df['target']
+X_test = pd.DataFrame(to_float(test_df, np.float64), columns=FEATURE_COLUMNS)
+y_test = test_df[TARGET_COLUMN]
 
 # Transform the test data
 X_test_transformed = preprocessor.transform(X_test)
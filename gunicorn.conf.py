@@ -0,0 +1,77 @@
+# Pre-fork serving mode: gunicorn -c gunicorn.conf.py
+#
+# The master imports app.py and warms the artifacts once; workers are forked
+# from it and share those pages copy-on-write. When the inference bundle
+# changes, the master reloads it and sends itself SIGHUP, which forks fresh
+# workers from the updated master and gracefully retires the old ones.
+import os
+import gc
+import signal
+import threading
+import numpy as np
+
+wsgi_app = "app:app"
+preload_app = True
+
+bind = f"{os.environ.get('HOST', '0.0.0.0')}:{os.environ.get('PORT', 8080)}"
+workers = int(os.environ.get("WEB_CONCURRENCY", os.cpu_count() or 1))
+# Threads let the micro-batcher coalesce requests inside each worker
+worker_class = "gthread"
+threads = int(os.environ.get("HEART_WORKER_THREADS", 4))
+keepalive = int(os.environ.get("HEART_KEEP_ALIVE", 5))
+graceful_timeout = int(os.environ.get("HEART_GRACEFUL_SHUTDOWN", 30))
+
+# Worker recycling bounds slow growth from fragmentation or leaks
+max_requests = int(os.environ.get("HEART_WORKER_MAX_REQUESTS", 10000))
+max_requests_jitter = max_requests // 10
+
+reload_poll_seconds = float(os.environ.get("HEART_ARTIFACT_CHECK_INTERVAL", 2.0))
+
+
+def _warm_up(server):
+    import app as serving_app
+    from src.Heart.utils.schema import FEATURE_COLUMNS
+    from src.Heart.utils.result_cache import ResultCache
+    from src.Heart.pipeline.Prediction_pipeline import PredictPipeline
+
+    cache = serving_app.predict_pipeline.artifact_cache
+    artifacts = cache.refresh()
+    # One prediction initializes every lazily built structure before forking;
+    # it bypasses the result cache so the workers start with empty stats.
+    warm_pipeline = PredictPipeline(artifact_cache=cache, result_cache=ResultCache(max_entries=0))
+    warm_pipeline.predict_array(np.zeros((1, len(FEATURE_COLUMNS))))
+    # Move everything loaded so far into the permanent generation so the
+    # workers' garbage collector never writes to (and un-shares) those pages.
+    gc.collect()
+    gc.freeze()
+    server.log.info(f"Artifacts version {artifacts.version} warmed in master")
+    return artifacts.version
+
+
+def _watch_artifacts(server, version):
+    import app as serving_app
+
+    cache = serving_app.predict_pipeline.artifact_cache
+    while True:
+        threading.Event().wait(reload_poll_seconds)
+        try:
+            current = cache.refresh().version
+        except Exception as e:
+            server.log.warning(f"Artifact check failed: {e}")
+            continue
+        if current != version:
+            version = _warm_up(server)
+            server.log.info("Artifacts changed, rolling the workers")
+            os.kill(os.getpid(), signal.SIGHUP)
+
+
+def when_ready(server):
+    version = _warm_up(server)
+    threading.Thread(target=_watch_artifacts, args=(server, version), name="heart-artifact-watcher", daemon=True).start()
+
+
+def post_fork(server, worker):
+    import app as serving_app
+
+    # Only the master reloads; a worker-side reload would load a private copy
+    serving_app.predict_pipeline.artifact_cache.stop_watching()
@@ -1,20 +1,15 @@
 import pandas as pd
-import pickle
 import numpy as np
+from src.Heart.utils.inference_bundle import load_bundle
 
 print("="*70)
 print("INVESTIGATING UNEXPECTED PREDICTION")
 print("="*70)
 
-# Load the trained model
-model_path = 'Artifacts/Model.pkl'
-with open(model_path, 'rb') as f:
-    model = pickle.load(f)
-
-# Load preprocessor
-preprocessor_path = 'Artifacts/Preprocessor.pkl'
-with open(preprocessor_path, 'rb') as f:
-    preprocessor = pickle.load(f)
+# Load the preprocessor and model trained together
+bundle_path = 'Artifacts/Inference_bundle.bin'
+bundle = load_bundle(bundle_path)
+model, preprocessor = bundle.model, bundle.preprocessor
 
 print(f"\n✓ Model loaded: {type(model).__name__}")
 
@@ -0,0 +1,237 @@
+import sys
+import json
+import hashlib
+import time
+import random
+import argparse
+import threading
+import http.client
+from urllib.parse import urlparse, urlencode
+
+# Replays patient payloads against a running server and reports latency percentiles.
+#
+#   python load_test.py --url http://127.0.0.1:8080 --payloads patients.jsonl --concurrency 16 --duration 30
+#   python load_test.py --synthetic 500 --rate 200 --save-baseline Artifacts/load_baseline.json
+#   python load_test.py --synthetic 500 --baseline Artifacts/load_baseline.json --threshold 0.10
+
+FEATURE_RANGES = {
+    'age': (29, 77), 'sex': (0, 1), 'cp': (1, 4), 'trestbps': (94, 200), 'chol': (126, 564),
+    'fbs': (0, 1), 'restecg': (0, 2), 'thalach': (71, 202), 'exang': (0, 1), 'oldpeak': (0.0, 6.2),
+    'slope': (1, 3), 'ca': (0, 3), 'thal': (3, 7),
+}
+
+
+def synthetic_payloads(count, seed=42):
+    rng = random.Random(seed)
+    payloads = []
+    for _ in range(count):
+        record = {}
+        for column, (low, high) in FEATURE_RANGES.items():
+            record[column] = round(rng.uniform(low, high), 1) if isinstance(low, float) else rng.randint(low, high)
+        payloads.append(record)
+    return payloads
+
+
+def load_payloads(path):
+    payloads = []
+    with open(path) as file_obj:
+        for line in file_obj:
+            if line.strip():
+                payloads.append(json.loads(line))
+    return payloads
+
+
+def encode_request(mode, payload):
+    if mode == 'form':
+        return '/', urlencode(payload), 'application/x-www-form-urlencoded'
+    if mode == 'batch':
+        return '/predict/batch', json.dumps(payload if isinstance(payload, list) else [payload]), 'application/json'
+    return '/predict', json.dumps(payload), 'application/json'
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    k = min(len(sorted_values) - 1, max(0, int(round(q / 100.0 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[k]
+
+
+class LoadGenerator:
+    def __init__(self, url, payloads, mode='json', concurrency=8, rate=None, duration=10.0, max_requests=None, timeout=30.0):
+        parsed = urlparse(url)
+        self.host = parsed.hostname or '127.0.0.1'
+        self.port = parsed.port or 80
+        self.requests = [encode_request(mode, payload) for payload in payloads]
+        self.concurrency = concurrency
+        self.rate = rate
+        self.duration = duration
+        self.max_requests = max_requests
+        self.timeout = timeout
+
+        self._lock = threading.Lock()
+        self._issued = 0
+        self._latencies = []
+        self._errors = 0
+
+    def _next_slot(self):
+        with self._lock:
+            if self.max_requests is not None and self._issued >= self.max_requests:
+                return None
+            slot = self._issued
+            self._issued += 1
+            return slot
+
+    def _worker(self, start, deadline):
+        # One keep-alive connection per client, reopened after any failure
+        connection = None
+        latencies = []
+        errors = 0
+        while True:
+            slot = self._next_slot()
+            if slot is None:
+                break
+            # Open-loop pacing: latency is measured from the scheduled send time so a
+            # slow server cannot hide queueing delay (coordinated omission).
+            scheduled = start + slot / self.rate if self.rate else time.perf_counter()
+            if scheduled >= deadline:
+                break
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+
+            path, body, content_type = self.requests[slot % len(self.requests)]
+            try:
+                if connection is None:
+                    connection = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+                connection.request('POST', path, body=body, headers={'Content-Type': content_type})
+                response = connection.getresponse()
+                response.read()
+                if response.status >= 400:
+                    errors += 1
+            except (OSError, http.client.HTTPException):
+                errors += 1
+                if connection is not None:
+                    connection.close()
+                connection = None
+            latencies.append(time.perf_counter() - scheduled)
+
+        if connection is not None:
+            connection.close()
+        with self._lock:
+            self._latencies.extend(latencies)
+            self._errors += errors
+
+    def run(self):
+        start = time.perf_counter()
+        deadline = start + self.duration if self.duration else float('inf')
+        threads = [threading.Thread(target=self._worker, args=(start, deadline), daemon=True) for _ in range(self.concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+
+        latencies = sorted(self._latencies)
+        ms = lambda seconds: round(seconds * 1000.0, 3)
+        return {
+            'requests': len(latencies),
+            'errors': self._errors,
+            'elapsed_seconds': round(elapsed, 3),
+            'throughput_rps': round(len(latencies) / elapsed, 2) if elapsed > 0 else 0.0,
+            'latency_ms': {
+                'p50': ms(percentile(latencies, 50)),
+                'p95': ms(percentile(latencies, 95)),
+                'p99': ms(percentile(latencies, 99)),
+                'max': ms(latencies[-1]) if latencies else 0.0,
+            },
+            'concurrency': self.concurrency,
+            'target_rate_rps': self.rate,
+        }
+
+
+def payload_fingerprint(payloads):
+    # Identifies the request mix, whether it came from a file or --synthetic
+    encoded = json.dumps(payloads, sort_keys=True).encode()
+    return {'count': len(payloads), 'sha256': hashlib.sha256(encoded).hexdigest()}
+
+
+# Run parameters a baseline is only comparable under
+BASELINE_PARAMETERS = ('mode', 'concurrency', 'target_rate_rps', 'payloads')
+
+
+def parameter_mismatches(result, baseline):
+    mismatches = []
+    for key in BASELINE_PARAMETERS:
+        if key not in baseline:
+            mismatches.append(f'baseline has no {key!r}; save it again with --save-baseline')
+        elif result[key] != baseline[key]:
+            mismatches.append(f'{key} is {result[key]!r}, baseline used {baseline[key]!r}')
+    return mismatches
+
+
+def compare_to_baseline(result, baseline, threshold):
+    # A regression is a drop in throughput or a rise in p95/p99 beyond the threshold
+    regressions = []
+    if result['throughput_rps'] < baseline['throughput_rps'] * (1 - threshold):
+        regressions.append(f"throughput {result['throughput_rps']} rps < baseline {baseline['throughput_rps']} rps")
+    for q in ('p95', 'p99'):
+        current, previous = result['latency_ms'][q], baseline['latency_ms'][q]
+        if current > previous * (1 + threshold):
+            regressions.append(f'{q} latency {current} ms > baseline {previous} ms')
+    if result['errors'] > baseline.get('errors', 0):
+        regressions.append(f"{result['errors']} errors (baseline {baseline.get('errors', 0)})")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Load-test the Heart prediction server.')
+    parser.add_argument('--url', default='http://127.0.0.1:8080')
+    parser.add_argument('--mode', choices=['json', 'form', 'batch'], default='json', help='/predict, / (HTML form) or /predict/batch')
+    parser.add_argument('--payloads', help='JSONL file with one patient record per line')
+    parser.add_argument('--synthetic', type=int, default=200, help='number of synthetic patients when --payloads is not given')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--rate', type=float, default=None, help='target requests/sec (default: as fast as possible)')
+    parser.add_argument('--duration', type=float, default=10.0, help='seconds to run')
+    parser.add_argument('--requests', type=int, default=None, help='stop after this many requests')
+    parser.add_argument('--warmup', type=int, default=20, help='requests sent before measuring')
+    parser.add_argument('--save-baseline', help='write the results to this JSON file')
+    parser.add_argument('--baseline', help='compare against this JSON baseline and exit 1 on regression '
+                                           '(2 if mode, concurrency, rate or payloads differ)')
+    parser.add_argument('--threshold', type=float, default=0.10, help='allowed relative regression, e.g. 0.10 = 10%%')
+    args = parser.parse_args(argv)
+
+    payloads = load_payloads(args.payloads) if args.payloads else synthetic_payloads(args.synthetic)
+    if args.warmup:
+        LoadGenerator(args.url, payloads, args.mode, concurrency=1, duration=None, max_requests=args.warmup).run()
+
+    result = LoadGenerator(args.url, payloads, args.mode, args.concurrency, args.rate, args.duration, args.requests).run()
+    result['mode'] = args.mode
+    result['payloads'] = payload_fingerprint(payloads)
+    print(json.dumps(result, indent=2))
+
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as file_obj:
+            json.dump(result, file_obj, indent=2)
+        print(f'Baseline saved to {args.save_baseline}')
+
+    if args.baseline:
+        with open(args.baseline) as file_obj:
+            baseline = json.load(file_obj)
+        mismatches = parameter_mismatches(result, baseline)
+        if mismatches:
+            print('NOT COMPARABLE WITH THE BASELINE:')
+            for mismatch in mismatches:
+                print(f'  - {mismatch}')
+            return 2
+        regressions = compare_to_baseline(result, baseline, args.threshold)
+        if regressions:
+            print('PERFORMANCE REGRESSION:')
+            for regression in regressions:
+                print(f'  - {regression}')
+            return 1
+        print(f'Within {args.threshold:.0%} of baseline')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
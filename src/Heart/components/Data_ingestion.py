@@ -1,45 +1,131 @@
 import os
 import sys
+import glob
 import numpy as np
 import pandas as pd
 from src.Heart.logger import logging
 from src.Heart.exception import customexception
-from sklearn.model_selection import train_test_split
+from src.Heart.utils.schema import FEATURE_COLUMNS, TARGET_COLUMN, storage_dtypes, to_storage
+from src.Heart.utils.split_store import SplitWriter, export_csv
 from dataclasses import dataclass
 from pathlib import Path
 
 class DataIngestionConfig:
-    raw_data_path:str = os.path.join("Artifacts","raw_data.csv")
-    train_data_path:str = os.path.join("Artifacts","train_data.csv")
-    test_data_path:str = os.path.join("Artifacts","test_data.csv")
+    # One file, a comma-separated list or a glob pattern, e.g. HEART_SOURCE_DATA="exports/site-*.csv"
+    source_data_path:str = os.environ.get('HEART_SOURCE_DATA', os.path.join("Notebook_Experiments","Data","heart.csv"))
+    # Columnar split directories (see utils/split_store.py)
+    raw_data_path:str = os.path.join("Artifacts","raw_data")
+    train_data_path:str = os.path.join("Artifacts","train_data")
+    test_data_path:str = os.path.join("Artifacts","test_data")
+    # HEART_SPLIT_CSV=1 also writes raw_data.csv/train_data.csv/test_data.csv next to them
+    write_csv:bool = os.environ.get('HEART_SPLIT_CSV', '0') == '1'
+    chunk_rows:int = int(os.environ.get('HEART_INGEST_CHUNK_ROWS', 50000))
+    test_size:float = 0.2
+    random_state:int = 42
+
+
+def resolve_source_paths(source_path):
+    # Accepts a path, a list of paths, a comma-separated string or glob patterns
+    if isinstance(source_path, str):
+        source_path = [path.strip() for path in source_path.split(',') if path.strip()]
+    paths = []
+    for pattern in source_path:
+        matches = sorted(glob.glob(pattern))
+        if not matches:
+            raise FileNotFoundError(f'No source data matches {pattern!r}')
+        paths.extend(matches)
+    return paths
+
+
+def row_hashes(chunk, random_state):
+    # A seeded hash of each row's values: the split of a row does not depend on
+    # the process, the platform or PYTHONHASHSEED
+    return pd.util.hash_pandas_object(chunk, index=False, hash_key=f'{random_state:016d}'[-16:]).to_numpy()
+
+
+def stratified_test_mask(labels, keys, class_counts, test_size):
+    # Single-pass stratified split. class_counts carries {label: [rows seen, rows
+    # sent to test]} across chunks; for each class the chunk contributes exactly
+    # the rows needed to bring its test share back to round(test_size * seen),
+    # picking the rows with the smallest hash keys. Every class ends within one
+    # row of test_size no matter how the rows are spread over chunks and files.
+    is_test = np.zeros(len(labels), dtype=bool)
+    for label in np.unique(labels):
+        rows = np.flatnonzero(labels == label)
+        counts = class_counts.setdefault(label.item(), [0, 0])
+        counts[0] += len(rows)
+        wanted = int(np.floor(test_size * counts[0] + 0.5)) - counts[1]
+        wanted = min(max(wanted, 0), len(rows))
+        if wanted:
+            is_test[rows[np.argsort(keys[rows], kind='stable')[:wanted]]] = True
+        counts[1] += wanted
+    return is_test
+
 
 class DataIngestion:
     def __init__(self):
         self.ingestion_config = DataIngestionConfig()
 
-    def initiate_data_ingestion(self):
-        logging.info("Data ingestion started")
-        try:
-            data = pd.read_csv("Notebook_Experiments\Data\heart.csv")
-            logging.info("Read the Data from the csv file")
+    def _export_csv(self):
+        if self.ingestion_config.write_csv:
+            for path in (self.ingestion_config.raw_data_path, self.ingestion_config.train_data_path, self.ingestion_config.test_data_path):
+                export_csv(path, f'{path}.csv')
+            logging.info("Exported the splits as csv")
 
-            os.makedirs(os.path.dirname(os.path.join(self.ingestion_config.raw_data_path)), exist_ok=True)
-            data.to_csv(self.ingestion_config.raw_data_path, index=False)
-            logging.info("Created the raw data file")
+    def initiate_data_ingestion(self, source_path=None):
+        # Same engine as the streaming mode; the default heart data fits in one chunk
+        return self.initiate_streaming_ingestion(source_path)
 
-            logging.info("Splitting the data into train and test")
-            train_data, test_data = train_test_split(data, test_size=0.2, random_state=42)
-            logging.info("Data Splitting is done")
+    def initiate_streaming_ingestion(self, source_path=None, chunk_rows=None, test_size=None, random_state=None):
+        # Reads every source file as a stream of chunks and assigns each row to
+        # train or test in one pass, so time and memory follow chunk_rows rather
+        # than the size of the data. Every chunk becomes one part of each split.
+        # The quota is balanced per chunk, so chunk_rows is part of the split's
+        # definition: both training modes use the configured size.
+        logging.info("Data ingestion started")
+        try:
+            config = self.ingestion_config
+            chunk_rows = chunk_rows or config.chunk_rows
+            test_size = config.test_size if test_size is None else test_size
+            random_state = config.random_state if random_state is None else random_state
+            source_paths = resolve_source_paths(source_path or config.source_data_path)
+            logging.info(f"Reading {len(source_paths)} source file(s) in chunks of {chunk_rows} rows")
 
-            train_data.to_csv(self.ingestion_config.train_data_path, index=False)
-            test_data.to_csv(self.ingestion_config.test_data_path, index=False)
-            logging.info("Created the train and test data files")
-            logging.info("Data ingestion completed")
+            os.makedirs(os.path.dirname(os.path.join(config.raw_data_path)), exist_ok=True)
+            # Compact dtypes from the feature schema, the same for every chunk
+            writers = {
+                name: SplitWriter(path, storage_dtypes())
+                for name, path in (('raw', config.raw_data_path),
+                                   ('train', config.train_data_path),
+                                   ('test', config.test_data_path))
+            }
+            try:
+                class_counts = {}
+                columns = FEATURE_COLUMNS + [TARGET_COLUMN]
+                for path in source_paths:
+                    for chunk in pd.read_csv(path, chunksize=chunk_rows, usecols=columns):
+                        try:
+                            chunk = to_storage(chunk)
+                        except ValueError as e:
+                            raise ValueError(f'{path}: {e}')
+                        writers['raw'].write(chunk)
+                        is_test = stratified_test_mask(chunk[TARGET_COLUMN].to_numpy(), row_hashes(chunk, random_state),
+                                                       class_counts, test_size)
+                        writers['train'].write(chunk[~is_test])
+                        writers['test'].write(chunk[is_test])
+                schemas = {name: writer.close() for name, writer in writers.items()}
+            except BaseException:
+                for writer in writers.values():
+                    writer.abort()
+                raise
 
+            logging.info(f"Split per class (rows, test rows): {class_counts}")
+            logging.info(f"Data ingestion completed: {schemas['train']['rows']} train rows, {schemas['test']['rows']} test rows")
+            self._export_csv()
             return (
-                self.ingestion_config.test_data_path,
-                self.ingestion_config.train_data_path
+                config.train_data_path,
+                config.test_data_path
             )
         except Exception as e:
             logging.info("Excpetion occured while ingesting the data")
-            raise customexception(e,sys)
\ No newline at end of file
+            raise customexception(e,sys)
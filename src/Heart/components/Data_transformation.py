@@ -7,6 +7,10 @@ from src.Heart.logger import logging
 from sklearn.pipeline import Pipeline
 from sklearn.impute import SimpleImputer
 from src.Heart.utils.utils import save_object
+from src.Heart.utils.schema import FEATURE_COLUMNS, TARGET_COLUMN, to_float
+from src.Heart.utils.dataset import Dataset
+from src.Heart.utils.split_store import load_columns, iter_split
+from src.Heart.utils.fused_preprocessor import compile_preprocessor, save_fused_preprocessor
 from sklearn.compose import ColumnTransformer
 from src.Heart.exception import customexception
 from sklearn.preprocessing import StandardScaler
@@ -15,6 +19,43 @@ from sklearn.preprocessing import StandardScaler
 @dataclass
 class DataTransformationConfig:
     preprocessor_obj_file_path=os.path.join('Artifacts','Preprocessor.pkl')
+    fused_preprocessor_file_path=os.path.join('Artifacts','Preprocessor.npz')
+    # Transformed X.npy/y.npy, handed to the trainer as read-only memory maps
+    train_dataset_dir_path=os.path.join('Artifacts','train_dataset')
+    test_dataset_dir_path=os.path.join('Artifacts','test_dataset')
+
+
+class ColumnReservoir:
+    # Uniform sample (algorithm R) of the non-missing values of every column,
+    # used to estimate the imputer medians in one pass. While fewer values than
+    # size have been seen the sample is the whole column and the median is exact.
+    def __init__(self, n_columns, size=100000, random_state=42):
+        self.size = size
+        self.samples = [np.empty(0) for _ in range(n_columns)]
+        self.seen = np.zeros(n_columns, dtype=np.int64)
+        self.rng = np.random.default_rng(random_state)
+
+    def update(self, X):
+        for column in range(X.shape[1]):
+            values = X[:, column]
+            values = values[~np.isnan(values)]
+            sample, seen = self.samples[column], self.seen[column]
+            room = self.size - len(sample)
+            if room > 0:
+                head = values[:room]
+                sample = np.concatenate([sample, head])
+                seen += len(head)
+                values = values[room:]
+            if len(values):
+                # The i-th value overall replaces a random slot with probability size/(i+1)
+                slots = self.rng.integers(0, seen + 1 + np.arange(len(values)))
+                keep = slots < self.size
+                sample[slots[keep]] = values[keep]
+                seen += len(values)
+            self.samples[column], self.seen[column] = sample, seen
+
+    def medians(self):
+        return np.array([np.median(sample) if len(sample) else np.nan for sample in self.samples])
 
 
 class DataTransformation:
@@ -26,7 +67,7 @@ class DataTransformation:
         try:
             logging.info('Data Transformation initiated')
 
-            numerical_cols = ['age', 'sex', 'cp', 'trestbps', 'chol', 'fbs', 'restecg', 'thalach', 'exang', 'oldpeak', 'slope', 'ca', 'thal']
+            numerical_cols = FEATURE_COLUMNS
             logging.info('Numerical Pipeline Initiated')
             
             ## Numerical Pipeline
@@ -44,39 +85,128 @@ class DataTransformation:
             
     
     def initialize_data_transformation(self,train_path,test_path):
+        # Returns train and test Datasets plus the fitted preprocessor. Each
+        # split's stored columns are converted straight into a preallocated
+        # float32 X.npy, which the preprocessor then scales in place. y keeps its
+        # compact stored dtype. Apart from X itself, only one column (while
+        # fitting) or one block of rows (while scaling) is ever held as a copy.
         try:
-            train_df=pd.read_csv(train_path)
-            test_df=pd.read_csv(test_path)
+            columns = FEATURE_COLUMNS + [TARGET_COLUMN]
+            train_columns=load_columns(train_path, columns)
+            test_columns=load_columns(test_path, columns)
             
             logging.info("read train and test data complete")
-            logging.info(f'Train Dataframe Head : \n{train_df.head().to_string()}')
-            logging.info(f'Test Dataframe Head : \n{test_df.head().to_string()}')
-            
-            preprocessing_obj = self.get_data_transformation()
-            
-            target_column_name = 'target'
-            drop_columns = [target_column_name]
-            
-            input_feature_train_df = train_df.drop(columns=drop_columns,axis=1)
-            target_feature_train_df=train_df[target_column_name]          
-            input_feature_test_df=test_df.drop(columns=drop_columns,axis=1)
-            target_feature_test_df=test_df[target_column_name]
-            logging.info("Splitting input and target features complete")
+            logging.info(f'Train split : {len(train_columns[TARGET_COLUMN])} rows')
+            logging.info(f'Test split : {len(test_columns[TARGET_COLUMN])} rows')
             
-            input_feature_train_arr=preprocessing_obj.fit_transform(input_feature_train_df)
-            input_feature_test_arr=preprocessing_obj.transform(input_feature_test_df)
+            X_train = Dataset.allocate_features(self.data_transformation_config.train_dataset_dir_path, len(train_columns[TARGET_COLUMN]))
+            X_test = Dataset.allocate_features(self.data_transformation_config.test_dataset_dir_path, len(test_columns[TARGET_COLUMN]))
+            # Stored compact columns become float32 with NaN where values are missing
+            to_float(train_columns, out=X_train)
+            to_float(test_columns, out=X_test)
+            logging.info("Feature matrices built")
+
+            preprocessing_obj = self.fit_preprocessor(X_train)
+            # The fused form applies the same operations as the fitted pipeline
+            # (bit-identical) and can write its result over its input
+            fused = compile_preprocessor(preprocessing_obj)
+            fused.transform(X_train, out=X_train)
+            fused.transform(X_test, out=X_test)
             logging.info("Applying preprocessing object on training and testing datasets.")
-            
-            train_arr = np.c_[input_feature_train_arr, np.array(target_feature_train_df)]
-            test_arr = np.c_[input_feature_test_arr, np.array(target_feature_test_df)]
+
+            train_dataset = Dataset.save(self.data_transformation_config.train_dataset_dir_path, X_train, train_columns[TARGET_COLUMN])
+            test_dataset = Dataset.save(self.data_transformation_config.test_dataset_dir_path, X_test, test_columns[TARGET_COLUMN])
+            del X_train, X_test
+            logging.info("transformed train and test datasets saved")
 
             save_object(
                 file_path=self.data_transformation_config.preprocessor_obj_file_path,
                 obj=preprocessing_obj)
             
             logging.info("preprocessing pickle file saved")
-            return (train_arr,test_arr)
+
+            save_fused_preprocessor(
+                file_path=self.data_transformation_config.fused_preprocessor_file_path,
+                fused=fused)
+            logging.info("fused preprocessing arrays saved")
+            return (train_dataset,test_dataset,preprocessing_obj)
             
         except Exception as e:
             logging.info("Exception occured in the initiate_datatransformation")
-            raise customexception(e,sys)
\ No newline at end of file
+            raise customexception(e,sys)
+
+    def preprocessor_from_statistics(self, medians, mean, var, n_samples):
+        # Fitting on one row of medians gives the imputer exactly those statistics;
+        # the scaler moments are then replaced by the ones streamed over the data
+        preprocessing_obj = self.get_data_transformation()
+        preprocessing_obj.fit(pd.DataFrame([medians], columns=FEATURE_COLUMNS))
+        scaler = preprocessing_obj.named_transformers_['num_pipeline'].named_steps['scaler']
+        scale = np.sqrt(var)
+        scaler.mean_ = np.asarray(mean, dtype=np.float64)
+        scaler.var_ = np.asarray(var, dtype=np.float64)
+        # Constant columns are left unscaled, as StandardScaler does
+        scaler.scale_ = np.where(scale < 10 * np.finfo(np.float64).eps, 1.0, scale)
+        scaler.n_samples_seen_ = int(n_samples)
+        return preprocessing_obj
+
+    def fit_preprocessor(self, X):
+        # Same statistics as fitting the pipeline on X, computed one column at a
+        # time: ColumnTransformer.fit would hold several full copies of X (the
+        # masked array behind the median, the imputed matrix fed to the scaler)
+        n_rows = X.shape[0]
+        medians, mean, var = (np.empty(X.shape[1]) for _ in range(3))
+        for j, column in enumerate(FEATURE_COLUMNS):
+            values = np.array(X[:, j])
+            missing = np.isnan(values)
+            if missing.all():
+                raise ValueError(f'No values to impute from in column {column!r}')
+            medians[j] = np.median(values[~missing])
+            values[missing] = medians[j]
+            # Float64 accumulation, as StandardScaler does for float32 input
+            mean[j] = values.sum(dtype=np.float64) / n_rows
+            var[j] = np.square(values - mean[j]).sum() / n_rows
+        return self.preprocessor_from_statistics(medians, mean, var, n_rows)
+
+    def initialize_streaming_transformation(self, train_path, reservoir_size=100000):
+        # One pass over the train split part by part: a reservoir sample per column
+        # for the medians and StandardScaler.partial_fit (which skips NaNs) for
+        # the moments. Returns the fitted preprocessor and the target classes.
+        try:
+            reservoir = ColumnReservoir(len(FEATURE_COLUMNS), reservoir_size)
+            scaler = StandardScaler()
+            classes = set()
+            n_rows = 0
+            for chunk in iter_split(train_path, FEATURE_COLUMNS + [TARGET_COLUMN]):
+                X = to_float(chunk, np.float64)
+                reservoir.update(X)
+                scaler.partial_fit(X)
+                classes.update(chunk[TARGET_COLUMN].unique().tolist())
+                n_rows += len(X)
+            logging.info(f'Streamed preprocessing statistics over {n_rows} train rows')
+
+            medians = reservoir.medians()
+            if np.isnan(medians).any():
+                empty = [column for column, median in zip(FEATURE_COLUMNS, medians) if np.isnan(median)]
+                raise ValueError(f'No values to impute from in columns {empty}')
+
+            # Moments after imputation: the observed values plus n_missing copies of the median
+            observed = scaler.n_samples_seen_
+            n_missing = n_rows - observed
+            mean = (observed * scaler.mean_ + n_missing * medians) / n_rows
+            var = (observed * (scaler.var_ + (scaler.mean_ - mean) ** 2) + n_missing * (medians - mean) ** 2) / n_rows
+            preprocessing_obj = self.preprocessor_from_statistics(medians, mean, var, n_rows)
+
+            save_object(
+                file_path=self.data_transformation_config.preprocessor_obj_file_path,
+                obj=preprocessing_obj)
+            logging.info("preprocessing pickle file saved")
+
+            save_fused_preprocessor(
+                file_path=self.data_transformation_config.fused_preprocessor_file_path,
+                fused=compile_preprocessor(preprocessing_obj))
+            logging.info("fused preprocessing arrays saved")
+            return preprocessing_obj, np.array(sorted(classes))
+
+        except Exception as e:
+            logging.info("Exception occured in the initialize_streaming_transformation")
+            raise customexception(e,sys)
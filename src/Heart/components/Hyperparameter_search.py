@@ -0,0 +1,284 @@
+import os
+import sys
+import json
+import math
+import time
+import hashlib
+import numpy as np
+from sklearn.svm import SVC
+from xgboost import XGBClassifier
+from dataclasses import dataclass
+from src.Heart.logger import logging
+from sklearn.naive_bayes import GaussianNB
+from sklearn.tree import DecisionTreeClassifier
+from src.Heart.exception import customexception
+from sklearn.neighbors import KNeighborsClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.model_selection import train_test_split
+from src.Heart.utils.utils import evaluate_model
+
+
+# Declarative search spaces, keyed by the model names used in ModelTrainer.
+#   ('int', low, high)      uniform integer, both ends included
+#   ('float', low, high)    uniform float
+#   ('log', low, high)      log-uniform float
+#   ('choice', [values])    one of the values
+# 'resource' is what successive halving grows from rung to rung: either an
+# estimator parameter (e.g. n_estimators) or 'data_fraction' of the training rows.
+SEARCH_SPACES = {
+    'Logistic Regression': {
+        'estimator': LogisticRegression,
+        'fixed': {'max_iter': 1000},
+        'space': {'C': ('log', 1e-3, 1e2)},
+        'resource': ('data_fraction', 1 / 9, 1.0),
+    },
+    'Naive Bayes': {
+        'estimator': GaussianNB,
+        'fixed': {},
+        'space': {'var_smoothing': ('log', 1e-12, 1e-3)},
+        'resource': ('data_fraction', 1 / 9, 1.0),
+    },
+    'Random Forest Classfier': {
+        'estimator': RandomForestClassifier,
+        'fixed': {'random_state': 12},
+        'space': {
+            'max_depth': ('int', 2, 12),
+            'min_samples_leaf': ('int', 1, 10),
+            'max_features': ('choice', ['sqrt', 'log2', None]),
+            'criterion': ('choice', ['gini', 'entropy']),
+        },
+        'resource': ('n_estimators', 9, 243),
+    },
+    'XG Boost': {
+        'estimator': XGBClassifier,
+        'fixed': {'seed': 27},
+        'space': {
+            'learning_rate': ('log', 0.005, 0.3),
+            'max_depth': ('int', 2, 15),
+            'gamma': ('float', 0.0, 1.0),
+            'subsample': ('float', 0.5, 1.0),
+            'colsample_bytree': ('float', 0.5, 1.0),
+            'reg_lambda': ('log', 0.1, 10.0),
+            'booster': ('choice', ['gbtree', 'dart']),
+        },
+        'resource': ('n_estimators', 9, 243),
+    },
+    'K Nearest Neighbors': {
+        'estimator': KNeighborsClassifier,
+        'fixed': {},
+        'space': {'n_neighbors': ('int', 3, 31), 'weights': ('choice', ['uniform', 'distance'])},
+        'resource': ('data_fraction', 1 / 3, 1.0),
+    },
+    'Decision Tree': {
+        'estimator': DecisionTreeClassifier,
+        'fixed': {'random_state': 0},
+        'space': {
+            'max_depth': ('int', 2, 12),
+            'min_samples_leaf': ('int', 1, 20),
+            'criterion': ('choice', ['gini', 'entropy']),
+        },
+        'resource': ('data_fraction', 1 / 9, 1.0),
+    },
+    'Support Vector Machine': {
+        'estimator': SVC,
+        'fixed': {'kernel': 'rbf'},
+        'space': {'C': ('log', 1e-2, 1e2), 'gamma': ('log', 1e-4, 1.0)},
+        'resource': ('data_fraction', 1 / 9, 1.0),
+    },
+}
+
+
+@dataclass
+class HyperparameterSearchConfig:
+    trials_file_path = os.path.join('Artifacts','Hyperparameter_search.jsonl')
+    # Total wall-clock seconds for the whole search; 0 keeps ModelTrainer on the fixed hyperparameters
+    budget_seconds = float(os.environ.get('HEART_SEARCH_BUDGET', 0))
+    trial_timeout = float(os.environ.get('HEART_SEARCH_TRIAL_TIMEOUT', 120))
+    n_jobs = int(os.environ.get('HEART_SEARCH_JOBS', os.cpu_count() or 1))
+    eta = 3
+    validation_size = 0.2
+    seed = 42
+
+
+def sample_params(space, rng):
+    params = {}
+    for name, spec in space.items():
+        kind = spec[0]
+        if kind == 'choice':
+            params[name] = spec[1][int(rng.integers(len(spec[1])))]
+        elif kind == 'int':
+            params[name] = int(rng.integers(spec[1], spec[2] + 1))
+        elif kind == 'float':
+            params[name] = float(rng.uniform(spec[1], spec[2]))
+        elif kind == 'log':
+            params[name] = float(math.exp(rng.uniform(math.log(spec[1]), math.log(spec[2]))))
+        else:
+            raise ValueError(f'Unknown search space type {kind!r} for {name}')
+    return params
+
+
+def hyperband_brackets(min_resource, max_resource, eta):
+    # Yields (bracket, configs, resources per rung), from the most exploratory
+    # bracket (many configs, small resource) to plain full-resource random search
+    s_max = int(math.floor(math.log(max_resource / min_resource, eta) + 1e-9))
+    for s in range(s_max, -1, -1):
+        n_configs = int(math.ceil((s_max + 1) / (s + 1) * eta ** s))
+        yield s, n_configs, [max_resource * eta ** (i - s) for i in range(s + 1)]
+
+
+class HyperparameterSearch:
+    def __init__(self, search_spaces=None):
+        self.config = HyperparameterSearchConfig()
+        self.search_spaces = search_spaces or SEARCH_SPACES
+        self.history = {}
+
+    def _load_history(self):
+        self.history = {}
+        if not os.path.exists(self.config.trials_file_path):
+            return
+        with open(self.config.trials_file_path) as file_obj:
+            for line in file_obj:
+                try:
+                    trial = json.loads(line)
+                except ValueError:
+                    # A search killed mid-write leaves a truncated last line
+                    continue
+                self.history[trial['trial_id']] = trial
+        logging.info(f'Loaded {len(self.history)} previous trials from {self.config.trials_file_path}')
+
+    def _record(self, trial):
+        self.history[trial['trial_id']] = trial
+        os.makedirs(os.path.dirname(self.config.trials_file_path), exist_ok=True)
+        with open(self.config.trials_file_path, 'a') as file_obj:
+            file_obj.write(json.dumps(trial) + '\n')
+
+    def _trial_id(self, fingerprint, family, params, resource):
+        key = json.dumps([fingerprint, family, params, resource], sort_keys=True)
+        return hashlib.sha256(key.encode()).hexdigest()[:16]
+
+    def _build(self, family, params, resource):
+        spec = self.search_spaces[family]
+        kwargs = dict(spec['fixed'], **params)
+        resource_name = spec['resource'][0]
+        if resource_name != 'data_fraction':
+            kwargs[resource_name] = resource
+        return spec['estimator'](**kwargs)
+
+    def _resource_value(self, family, resource):
+        return resource if self.search_spaces[family]['resource'][0] == 'data_fraction' else int(round(resource))
+
+    def _run_rung(self, family, configs, resource, X_fit, y_fit, X_val, y_val, fingerprint, deadline):
+        spec = self.search_spaces[family]
+        if spec['resource'][0] == 'data_fraction':
+            # Rows are pre-shuffled, so every fraction is a nested random subset
+            rows = max(int(round(resource * len(X_fit))), 10)
+            X_rung, y_rung = X_fit[:rows], y_fit[:rows]
+        else:
+            X_rung, y_rung = X_fit, y_fit
+
+        trials, models = [], {}
+        for params in configs:
+            trial_id = self._trial_id(fingerprint, family, params, resource)
+            trials.append((trial_id, params))
+            if trial_id not in self.history:
+                models[trial_id] = self._build(family, params, resource)
+
+        results = {}
+        if models:
+            report = evaluate_model(X_rung, y_rung, X_val, y_val, models, n_jobs=self.config.n_jobs,
+                                    timeout=self.config.trial_timeout, profile=False, deadline=deadline)
+            for trial_id, result in report.items():
+                params = next(p for t, p in trials if t == trial_id)
+                results[trial_id] = dict(
+                    trial_id=trial_id, family=family, params=params, resource=resource,
+                    timestamp=time.time(), **result)
+                # Trials cut short by the search budget are not recorded, so a
+                # resumed search runs them instead of treating them as done
+                if result['status'] not in ('skipped', 'interrupted'):
+                    self._record(results[trial_id])
+        return [self.history.get(trial_id) or results[trial_id] for trial_id, _ in trials]
+
+    def search(self, X_train, y_train, budget_seconds=None):
+        try:
+            budget_seconds = self.config.budget_seconds if budget_seconds is None else budget_seconds
+            deadline = time.monotonic() + budget_seconds if budget_seconds else float('inf')
+            eta = self.config.eta
+
+            # Trials are scored on a stratified hold-out of the training split;
+            # the test split stays untouched for the final model comparison.
+            X_fit, X_val, y_fit, y_val = train_test_split(
+                X_train, y_train, test_size=self.config.validation_size,
+                stratify=y_train, random_state=self.config.seed)
+            # Results are only reused for exactly the same data and hold-out
+            digest = hashlib.sha256()
+            for array in (X_train, y_train):
+                digest.update(np.ascontiguousarray(array).reshape(-1).view(np.uint8))
+            digest.update(repr((self.config.validation_size, self.config.seed)).encode())
+            fingerprint = digest.hexdigest()[:16]
+            self._load_history()
+
+            brackets = {
+                family: list(hyperband_brackets(spec['resource'][1], spec['resource'][2], eta))
+                for family, spec in self.search_spaces.items()
+            }
+            out_of_budget = False
+            # Families take turns bracket by bracket so a tight budget still
+            # searches every family instead of exhausting itself on the first one
+            for round_index in range(max(len(b) for b in brackets.values())):
+                for family_index, family in enumerate(self.search_spaces):
+                    if out_of_budget or round_index >= len(brackets[family]):
+                        continue
+                    s, n_configs, resources = brackets[family][round_index]
+                    # Seeded per family and bracket so a resumed search samples
+                    # the same configurations and finds them in the history
+                    rng = np.random.default_rng([self.config.seed, family_index, s])
+                    configs = [sample_params(self.search_spaces[family]['space'], rng) for _ in range(n_configs)]
+
+                    for rung, resource in enumerate(resources):
+                        if time.monotonic() >= deadline:
+                            out_of_budget = True
+                            break
+                        resource = self._resource_value(family, resource)
+                        # Every trial stops at its own timeout or at the end of
+                        # the budget, whichever comes first
+                        results = self._run_rung(family, configs, resource, X_fit, y_fit, X_val, y_val, fingerprint, deadline)
+                        logging.info(f'{family} bracket {s} rung {rung}: {len(configs)} configs at resource {resource}')
+
+                        # Successive halving: keep the best 1/eta for the next rung
+                        keep = max(1, len(configs) // eta)
+                        ranked = sorted(zip(results, configs), key=lambda rc: -(rc[0]['accuracy'] if rc[0]['status'] == 'ok' else -1.0))
+                        configs = [config for result, config in ranked[:keep] if result['status'] == 'ok']
+                        if not configs:
+                            break
+
+            if out_of_budget:
+                logging.info('Hyperparameter search stopped at the wall-clock budget')
+            return self.best_trials(fingerprint)
+
+        except Exception as e:
+            logging.info('Exception occured during hyperparameter search')
+            raise customexception(e,sys)
+
+    def best_trials(self, fingerprint):
+        best = {}
+        for family in self.search_spaces:
+            trials = [
+                trial for trial in self.history.values()
+                if trial['family'] == family and trial['status'] == 'ok'
+                and trial['trial_id'] == self._trial_id(fingerprint, family, trial['params'], trial['resource'])
+            ]
+            if trials:
+                # Prefer the highest-fidelity results, then the best accuracy
+                best[family] = max(trials, key=lambda trial: (trial['resource'], trial['accuracy']))
+        return best
+
+    def best_models(self, X_train, y_train, budget_seconds=None):
+        # Unfitted estimators with the best configuration per family, at the full resource
+        best = self.search(X_train, y_train, budget_seconds)
+        models = {}
+        for family, trial in best.items():
+            full_resource = self._resource_value(family, self.search_spaces[family]['resource'][2])
+            models[family] = self._build(family, trial['params'], full_resource)
+            logging.info(f"Best {family}: {trial['params']} (validation accuracy {trial['accuracy']:.4f})")
+        return models
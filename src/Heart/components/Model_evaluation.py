@@ -5,8 +5,10 @@ import pickle
 import numpy as np
 import mlflow.sklearn
 from urllib.parse import urlparse
-from src.Heart.utils.utils import load_object
-from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score
+from src.Heart.utils.inference_bundle import load_bundle
+from src.Heart.utils.fused_preprocessor import compile_preprocessor
+from src.Heart.components.Streaming_trainer import iter_train_chunks
+from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score, confusion_matrix
 
 
 class ModelEvaluation:
@@ -21,41 +23,75 @@ class ModelEvaluation:
         return accuracy, precision, recall, f1
     
 
-    def initate_model_evaluation(self, train_array, test_array):
+    def metrics_from_confusion(self,confusion):
+        # Same values as eval_metrics, from a summed [[tn, fp], [fn, tp]] matrix
+        (tn, fp), (fn, tp) = confusion.tolist()
+        accuracy = (tp + tn) / (tn + fp + fn + tp)
+        precision = tp / (tp + fp) if tp + fp else 0.0
+        recall = tp / (tp + fn) if tp + fn else 0.0
+        f1 = 2 * tp / (2 * tp + fp + fn) if tp else 0.0
+        return accuracy, precision, recall, f1
+
+
+    def initate_model_evaluation(self, test_dataset):
         try:
-            X_test,y_test=(test_array[:,:-1], test_array[:,-1])
-            model_path=os.path.join("Artifacts","Model.pkl")
-            model=load_object(model_path)
-
-            mlflow.set_registry_uri("https://dagshub.com/HemaKalyan45/Heart-Disease-Prediction.mlflow")
-                        
-            tracking_url_type_store = urlparse(mlflow.get_tracking_uri()).scheme
-            
-            print(tracking_url_type_store)
-
-            with mlflow.start_run():
-
-                predicted_qualities = model.predict(X_test)
-
-                (accuracy, precision, recall, f1) = self.eval_metrics(y_test,predicted_qualities)
-
-                mlflow.log_metric("Testing Accuracy", accuracy)
-                mlflow.log_metric("Precision Score", precision)
-                mlflow.log_metric("Recall Score", recall)
-                mlflow.log_metric("F1 Score", f1)
-
-                # Model registry does not work with file store
-                if tracking_url_type_store != "file":
-
-                    # Register the model
-                    # There are other ways to use the Model Registry, which depends on the use case,
-                    # please refer to the doc for more information:
-                    # https://mlflow.org/docs/latest/model-registry.html#api-workflow
-                    mlflow.sklearn.log_model(model, "Model", registered_model_name="ml_model")
-                else:
-                    mlflow.sklearn.log_model(model, "Model")
-                
+            X_test,y_test=(test_dataset.X, test_dataset.y)
+            bundle_path=os.path.join("Artifacts","Inference_bundle.bin")
+            bundle=load_bundle(bundle_path)
+
+            predicted_qualities = bundle.model.predict(X_test)
+            self.log_evaluation(bundle, self.eval_metrics(y_test,predicted_qualities))
+
         except Exception as e:
             raise e
 
 
+    def initiate_streaming_evaluation(self, test_path, chunk_rows):
+        # The stored test split is scored chunk by chunk, like the streaming
+        # trainer reads it, and only the confusion matrix is kept
+        try:
+            bundle_path=os.path.join("Artifacts","Inference_bundle.bin")
+            bundle=load_bundle(bundle_path)
+            fused=compile_preprocessor(bundle.preprocessor)
+
+            confusion=np.zeros((2, 2), dtype=np.int64)
+            for X_test, y_test in iter_train_chunks(test_path, fused, chunk_rows):
+                confusion+=confusion_matrix(y_test, bundle.model.predict(X_test), labels=[0, 1])
+            if not confusion.sum():
+                raise ValueError(f'{test_path} has no rows to evaluate the model on')
+
+            self.log_evaluation(bundle, self.metrics_from_confusion(confusion))
+
+        except Exception as e:
+            raise e
+
+
+    def log_evaluation(self, bundle, metrics):
+        model=bundle.model
+        (accuracy, precision, recall, f1) = metrics
+
+        mlflow.set_registry_uri("https://dagshub.com/HemaKalyan45/Heart-Disease-Prediction.mlflow")
+                    
+        tracking_url_type_store = urlparse(mlflow.get_tracking_uri()).scheme
+        
+        print(tracking_url_type_store)
+
+        with mlflow.start_run():
+
+            mlflow.log_param("Training Data SHA256", bundle.metadata['training_data']['sha256'])
+
+            mlflow.log_metric("Testing Accuracy", accuracy)
+            mlflow.log_metric("Precision Score", precision)
+            mlflow.log_metric("Recall Score", recall)
+            mlflow.log_metric("F1 Score", f1)
+
+            # Model registry does not work with file store
+            if tracking_url_type_store != "file":
+
+                # Register the model
+                # There are other ways to use the Model Registry, which depends on the use case,
+                # please refer to the doc for more information:
+                # https://mlflow.org/docs/latest/model-registry.html#api-workflow
+                mlflow.sklearn.log_model(model, "Model", registered_model_name="ml_model")
+            else:
+                mlflow.sklearn.log_model(model, "Model")
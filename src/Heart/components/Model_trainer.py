@@ -14,49 +14,81 @@ from src.Heart.exception import customexception
 from sklearn.neighbors import KNeighborsClassifier
 from sklearn.linear_model import LogisticRegression
 from sklearn.ensemble import RandomForestClassifier
+from src.Heart.utils.fit_cache import FitCache, FitCacheConfig
 from src.Heart.utils.utils import save_object, evaluate_model
+from src.Heart.utils.model_selection import select_model, save_selection
+from src.Heart.utils.model_export import export_model, is_exportable
+from src.Heart.utils.inference_bundle import save_bundle, training_metadata
+from src.Heart.components.Hyperparameter_search import HyperparameterSearch, HyperparameterSearchConfig
+
+
+def get_candidate_models():
+    return {
+        'Logistic Regression':LogisticRegression(),
+        'Naive Bayes':GaussianNB(),
+        'Random Forest Classfier':RandomForestClassifier(n_estimators=20, random_state=12,max_depth=5),
+        'XG Boost':XGBClassifier(learning_rate=0.01, n_estimators=25, max_depth=15,gamma=0.6, subsample=0.52,colsample_bytree=0.6,
+                                 seed=27, reg_lambda=2, booster='dart', colsample_bylevel=0.6, colsample_bynode=0.5),
+        'K Nearest Neighbors':KNeighborsClassifier(n_neighbors=10),
+        'Decision Tree':DecisionTreeClassifier(criterion = 'entropy',random_state=0,max_depth = 6),
+        'Support Vector Machine':SVC(kernel='rbf', C=2)
+        }
 
 
 @dataclass 
 class ModelTrainerConfig:
     trained_model_file_path = os.path.join('Artifacts','Model.pkl')
+    exported_model_dir_path = os.path.join('Artifacts','Model_arrays')
+    model_selection_file_path = os.path.join('Artifacts','Model_selection.json')
+    # Preprocessor and selected model in one file, what serving loads by default
+    inference_bundle_file_path = os.path.join('Artifacts','Inference_bundle.bin')
+    # Models fitted concurrently (default: one per core) and the per-model time limit in seconds
+    n_jobs = int(os.environ.get('HEART_TRAIN_JOBS', os.cpu_count() or 1))
+    model_timeout = float(os.environ['HEART_TRAIN_TIMEOUT']) if os.environ.get('HEART_TRAIN_TIMEOUT') else None
     
     
 class ModelTrainer:
     def __init__(self):
         self.model_trainer_config = ModelTrainerConfig()
     
-    def initate_model_training(self,train_array,test_array):
+    def initate_model_training(self,train_dataset,test_dataset,preprocessor,train_data_path):
+        # preprocessor and train_data_path are the ones the datasets were built
+        # with; both go into the inference bundle next to the selected model
         try:
-            logging.info('Splitting Dependent and Independent variables from train and test data')
+            # Datasets keep X and y apart, so nothing is sliced or copied here
             X_train, y_train, X_test, y_test = (
-                train_array[:,:-1],
-                train_array[:,-1],
-                test_array[:,:-1],
-                test_array[:,-1])
+                train_dataset.X,
+                train_dataset.y,
+                test_dataset.X,
+                test_dataset.y)
             
-            models = {
-                'Logistic Regression':LogisticRegression(),
-                'Naive Bayes':GaussianNB(),
-                'Random Forest Classfier':RandomForestClassifier(n_estimators=20, random_state=12,max_depth=5),
-                'XG Boost':XGBClassifier(learning_rate=0.01, n_estimators=25, max_depth=15,gamma=0.6, subsample=0.52,colsample_bytree=0.6,
-                                         seed=27, reg_lambda=2, booster='dart', colsample_bylevel=0.6, colsample_bynode=0.5),
-                'K Nearest Neighbors':KNeighborsClassifier(n_neighbors=10),
-                'Decision Tree':DecisionTreeClassifier(criterion = 'entropy',random_state=0,max_depth = 6),
-                'Support Vector Machine':SVC(kernel='rbf', C=2)
-                }
+            models = get_candidate_models()
+
+            # With a search budget the fixed hyperparameters of get_candidate_models() are replaced
+            # by the best configuration found for each model family
+            if HyperparameterSearchConfig.budget_seconds > 0:
+                logging.info(f'Hyperparameter search started ({HyperparameterSearchConfig.budget_seconds}s budget)')
+                models.update(HyperparameterSearch().best_models(X_train, y_train))
             
-            model_report = evaluate_model(X_train, y_train, X_test, y_test, models)
-            print(model_report)
+            model_report = evaluate_model(X_train, y_train, X_test, y_test, models,
+                                          n_jobs=self.model_trainer_config.n_jobs,
+                                          timeout=self.model_trainer_config.model_timeout,
+                                          fit_cache=FitCache() if FitCacheConfig.enabled else None)
+            for model_name, result in model_report.items():
+                if result['status'] == 'ok':
+                    cached = ' (cached)' if result['cached'] else ''
+                    print(f"{model_name}: accuracy {result['accuracy']:.4f}, fit {result['fit_seconds']:.3f}s, "
+                          f"p99 {result['latency_p99_ms']:.3f}ms/row, {result['batch_rows_per_second']:,.0f} rows/s, "
+                          f"{result['model_size_bytes'] / 1024:.1f} KiB{cached}")
+                else:
+                    print(f"{model_name}: {result['status']} ({result['error']})")
             print('\n====================================================================================\n')
             logging.info(f'Model Report: {model_report}')
 
-            # To get the best model score from the dictionary
-            best_model_score = max(sorted(model_report.values()))
-
-            best_model_name = list(model_report.keys())[
-                list(model_report.values()).index(best_model_score)
-            ]
+            # Accuracy alone by default; HEART_SELECTION_POLICY trades it off
+            # against inference latency and model size
+            best_model_name, selection = select_model(model_report)
+            best_model_score = model_report[best_model_name]['accuracy']
 
             best_model = models[best_model_name]
 
@@ -68,6 +100,15 @@ class ModelTrainer:
                  file_path=self.model_trainer_config.trained_model_file_path,
                  obj=best_model
             )
+            save_selection(selection, self.model_trainer_config.model_selection_file_path)
+            save_bundle(self.model_trainer_config.inference_bundle_file_path, preprocessor, best_model,
+                        training_metadata(best_model_name, selection, train_data_path))
+
+            # Pickle-free copy for memory-mapped serving (HEART_MODEL_FORMAT=arrays)
+            if is_exportable(best_model):
+                export_model(best_model, self.model_trainer_config.exported_model_dir_path)
+            else:
+                logging.info(f'{best_model_name} has no pickle-free export, serving needs Model.pkl')
           
         except Exception as e:
             logging.info('Exception occured at Model Training')
@@ -0,0 +1,269 @@
+import os
+import sys
+import time
+import shutil
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+from xgboost import XGBClassifier
+from dataclasses import dataclass
+from src.Heart.logger import logging
+from sklearn.naive_bayes import GaussianNB
+from src.Heart.exception import customexception
+from sklearn.linear_model import SGDClassifier
+from src.Heart.utils.schema import FEATURE_COLUMNS, TARGET_COLUMN, to_float
+from src.Heart.utils.split_store import iter_split
+from src.Heart.utils.fused_preprocessor import compile_preprocessor
+from src.Heart.utils.utils import save_object, profile_inference, _report_entry
+from src.Heart.utils.model_selection import select_model, save_selection
+from src.Heart.utils.model_export import export_model, is_exportable
+from src.Heart.utils.inference_bundle import save_bundle, training_metadata
+
+
+# Bytes one row costs while its chunk is in flight: the parsed frame, the
+# float64 matrix, the transformed copy and estimator scratch, with headroom
+# for the CSV parser's buffers
+ROW_BYTES = (len(FEATURE_COLUMNS) + 1) * 8 * 16
+
+
+@dataclass
+class StreamingTrainerConfig:
+    trained_model_file_path = os.path.join('Artifacts','Model.pkl')
+    exported_model_dir_path = os.path.join('Artifacts','Model_arrays')
+    model_selection_file_path = os.path.join('Artifacts','Model_selection.json')
+    inference_bundle_file_path = os.path.join('Artifacts','Inference_bundle.bin')
+    # XGBoost pages the quantized training data here instead of holding it in memory
+    external_memory_dir_path = os.path.join('Artifacts','external_memory')
+    # Peak RSS the chunk size is derived from; HEART_CHUNK_ROWS overrides the derived size
+    max_rss_mb = float(os.environ.get('HEART_MAX_RSS_MB', 1024))
+    chunk_rows = int(os.environ['HEART_CHUNK_ROWS']) if os.environ.get('HEART_CHUNK_ROWS') else None
+    # Passes over the train split for SGD; naive Bayes needs exactly one
+    epochs = int(os.environ.get('HEART_STREAMING_EPOCHS', 5))
+    reservoir_size = 100000
+    xgb_rounds = 200
+    seed = 42
+
+
+def current_rss_bytes():
+    try:
+        with open('/proc/self/statm') as file_obj:
+            return int(file_obj.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        return 0
+
+
+def chunk_rows_for_memory(max_rss_mb, reserved_bytes=0, min_rows=1000, max_rows=1000000):
+    available = max_rss_mb * 2**20 - current_rss_bytes() - reserved_bytes
+    if available < min_rows * ROW_BYTES:
+        raise ValueError(f'{max_rss_mb} MB leaves no room for a chunk of {min_rows} rows '
+                         f'(the process already uses {current_rss_bytes() / 2**20:.0f} MB)')
+    return int(min(max_rows, available // ROW_BYTES))
+
+
+def _transform_chunk(pieces, fused):
+    chunk = pieces[0] if len(pieces) == 1 else pd.concat(pieces)
+    # float32 end to end; the fused preprocessor keeps the buffer dtype and
+    # scales it in place
+    X = to_float(chunk)
+    return fused.transform(X, out=X), chunk[TARGET_COLUMN].to_numpy()
+
+
+def iter_train_chunks(path, fused, chunk_rows):
+    # The stored parts follow the fixed ingestion chunk size, not the memory
+    # limit: they are memory maps, so they are sliced or joined into chunks of
+    # chunk_rows here without reading anything twice
+    pieces, pending_rows = [], 0
+    for part in iter_split(path, FEATURE_COLUMNS + [TARGET_COLUMN]):
+        start = 0
+        while start < len(part):
+            piece = part.iloc[start:start + chunk_rows - pending_rows]
+            pieces.append(piece)
+            pending_rows += len(piece)
+            start += len(piece)
+            if pending_rows == chunk_rows:
+                yield _transform_chunk(pieces, fused)
+                pieces, pending_rows = [], 0
+    if pieces:
+        yield _transform_chunk(pieces, fused)
+
+
+class ChunkIterator(xgb.DataIter):
+    # Feeds XGBoost one transformed chunk at a time; with a cache_prefix it
+    # builds its quantized pages on disk (external memory)
+    def __init__(self, path, fused, chunk_rows, cache_prefix):
+        self.path = path
+        self.fused = fused
+        self.chunk_rows = chunk_rows
+        self._chunks = None
+        super().__init__(cache_prefix=cache_prefix)
+
+    def next(self, input_data):
+        if self._chunks is None:
+            self._chunks = iter_train_chunks(self.path, self.fused, self.chunk_rows)
+        batch = next(self._chunks, None)
+        if batch is None:
+            return False
+        input_data(data=batch[0], label=batch[1])
+        return True
+
+    def reset(self):
+        self._chunks = None
+
+
+class StreamingTrainer:
+    def __init__(self):
+        self.streaming_trainer_config = StreamingTrainerConfig()
+        self._memory_warned = False
+
+    def chunk_rows(self):
+        config = self.streaming_trainer_config
+        if config.chunk_rows:
+            return config.chunk_rows
+        # The median reservoir stays resident for the whole run
+        reserved = config.reservoir_size * len(FEATURE_COLUMNS) * 8
+        chunk_rows = chunk_rows_for_memory(config.max_rss_mb, reserved_bytes=reserved)
+        logging.info(f'Streaming in chunks of {chunk_rows} rows for a {config.max_rss_mb:.0f} MB RSS limit')
+        return chunk_rows
+
+    def _check_memory(self):
+        rss_mb = current_rss_bytes() / 2**20
+        if rss_mb > self.streaming_trainer_config.max_rss_mb and not self._memory_warned:
+            self._memory_warned = True
+            logging.warning(f'RSS {rss_mb:.0f} MB is over HEART_MAX_RSS_MB={self.streaming_trainer_config.max_rss_mb:.0f}; '
+                            f'lower HEART_CHUNK_ROWS')
+
+    def _train_incremental(self, train_path, fused, classes, chunk_rows):
+        config = self.streaming_trainer_config
+        # name: (estimator, passes over the data)
+        models = {
+            'SGD Logistic Regression': (SGDClassifier(loss='log_loss', random_state=config.seed), config.epochs),
+            'Naive Bayes': (GaussianNB(), 1),
+        }
+        fit_seconds = dict.fromkeys(models, 0.0)
+        errors = {}
+        rng = np.random.default_rng(config.seed)
+
+        for epoch in range(max(passes for _, passes in models.values())):
+            for X, y in iter_train_chunks(train_path, fused, chunk_rows):
+                # Rows are shuffled within each chunk so SGD does not see them in file order
+                order = rng.permutation(len(X))
+                X, y = X[order], y[order]
+                for model_name, (model, passes) in models.items():
+                    if epoch >= passes or model_name in errors:
+                        continue
+                    try:
+                        start = time.perf_counter()
+                        model.partial_fit(X, y, classes=classes)
+                        fit_seconds[model_name] += time.perf_counter() - start
+                    except Exception as e:
+                        logging.info(f'{model_name} failed: {e}')
+                        errors[model_name] = f'{type(e).__name__}: {e}'
+                self._check_memory()
+            logging.info(f'Incremental training pass {epoch + 1} done')
+
+        return {name: model for name, (model, _) in models.items()}, fit_seconds, errors
+
+    def _train_xgboost(self, train_path, fused, classes, chunk_rows):
+        config = self.streaming_trainer_config
+        if list(classes) != [0, 1]:
+            raise ValueError(f'external-memory XGBoost expects 0/1 targets, got {list(classes)}')
+
+        shutil.rmtree(config.external_memory_dir_path, ignore_errors=True)
+        os.makedirs(config.external_memory_dir_path, exist_ok=True)
+        dtrain = None
+        try:
+            start = time.perf_counter()
+            iterator = ChunkIterator(train_path, fused, chunk_rows,
+                                     cache_prefix=os.path.join(config.external_memory_dir_path, 'train'))
+            dtrain = xgb.ExtMemQuantileDMatrix(iterator, max_bin=256)
+            booster = xgb.train(
+                {'tree_method': 'hist', 'objective': 'binary:logistic', 'max_depth': 6,
+                 'learning_rate': 0.1, 'subsample': 0.8, 'seed': config.seed},
+                dtrain, num_boost_round=config.xgb_rounds)
+            fit_seconds = time.perf_counter() - start
+        finally:
+            # The matrix owns the page files and removes them when it is freed
+            del dtrain
+            shutil.rmtree(config.external_memory_dir_path, ignore_errors=True)
+        self._check_memory()
+
+        # Wrapped as an XGBClassifier so prediction, export and serving treat it like any other candidate
+        model = XGBClassifier()
+        model.load_model(bytearray(booster.save_raw('ubj')))
+        return model, fit_seconds
+
+    def _score(self, models, test_path, fused, chunk_rows):
+        correct = dict.fromkeys(models, 0)
+        predict_seconds = dict.fromkeys(models, 0.0)
+        n_rows = 0
+        profile_rows = None
+        for X, y in iter_train_chunks(test_path, fused, chunk_rows):
+            for model_name, model in models.items():
+                start = time.perf_counter()
+                correct[model_name] += int((model.predict(X) == y).sum())
+                predict_seconds[model_name] += time.perf_counter() - start
+            n_rows += len(X)
+            if profile_rows is None:
+                profile_rows = X[:1000].copy()
+        if not n_rows:
+            raise ValueError(f'{test_path} has no rows to score the models on')
+        accuracy = {model_name: correct[model_name] / n_rows for model_name in models}
+        return accuracy, predict_seconds, profile_rows
+
+    def initiate_streaming_training(self, train_path, test_path, preprocessor, classes):
+        try:
+            fused = compile_preprocessor(preprocessor)
+            chunk_rows = self.chunk_rows()
+
+            logging.info('Streaming training started')
+            models, fit_seconds, errors = self._train_incremental(train_path, fused, classes, chunk_rows)
+            try:
+                models['XG Boost'], fit_seconds['XG Boost'] = self._train_xgboost(train_path, fused, classes, chunk_rows)
+            except Exception as e:
+                logging.info(f'XG Boost failed: {e}')
+                errors['XG Boost'] = f'{type(e).__name__}: {e}'
+
+            fitted = {model_name: model for model_name, model in models.items() if model_name not in errors}
+            accuracy, predict_seconds, profile_rows = self._score(fitted, test_path, fused, chunk_rows)
+
+            model_report = {}
+            for model_name in models:
+                if model_name in errors:
+                    model_report[model_name] = _report_entry('failed', error=errors[model_name])
+                    print(f'{model_name}: failed ({errors[model_name]})')
+                    continue
+                result = {'accuracy': accuracy[model_name], 'fit_seconds': fit_seconds[model_name],
+                          'predict_seconds': predict_seconds[model_name]}
+                result.update(profile_inference(fitted[model_name], profile_rows))
+                model_report[model_name] = _report_entry('ok', result)
+                print(f"{model_name}: accuracy {result['accuracy']:.4f}, fit {result['fit_seconds']:.3f}s, "
+                      f"p99 {result['latency_p99_ms']:.3f}ms/row, {result['batch_rows_per_second']:,.0f} rows/s, "
+                      f"{result['model_size_bytes'] / 1024:.1f} KiB")
+            print('\n====================================================================================\n')
+            logging.info(f'Model Report: {model_report}')
+
+            best_model_name, selection = select_model(model_report)
+            best_model_score = model_report[best_model_name]['accuracy']
+            best_model = fitted[best_model_name]
+
+            print(f'Best Model Found, Model Name: {best_model_name}, Accuracy Score: {best_model_score}')
+            print('\n====================================================================================\n')
+            logging.info(f'Best Model Found, Model Name: {best_model_name}, Accuracy Score: {best_model_score}')
+
+            save_object(
+                 file_path=self.streaming_trainer_config.trained_model_file_path,
+                 obj=best_model
+            )
+            save_selection(selection, self.streaming_trainer_config.model_selection_file_path)
+            save_bundle(self.streaming_trainer_config.inference_bundle_file_path, preprocessor, best_model,
+                        training_metadata(best_model_name, selection, train_path))
+
+            if is_exportable(best_model):
+                export_model(best_model, self.streaming_trainer_config.exported_model_dir_path)
+            else:
+                logging.info(f'{best_model_name} has no pickle-free export, serving needs Model.pkl')
+            return model_report
+
+        except Exception as e:
+            logging.info('Exception occured at Streaming Model Training')
+            raise customexception(e,sys)
@@ -1,18 +1,232 @@
 import os
+import json
+import queue
+import atexit
+import random
 import logging
-from datetime import datetime 
+import threading
+import logging.handlers
+from datetime import datetime, timezone
 
-LOG_FILE = f"{datetime.now().strftime('%Y_%m_%d_%H_%M_%S')}.log"
+# Logging is asynchronous: callers only format the message and put the record
+# on a bounded in-memory queue, a background thread writes batches to disk.
+# A full queue drops records instead of blocking the caller.
+#
+#   HEART_LOG_FILE          fixed file name (default: one timestamped file per run)
+#   HEART_LOG_FORMAT        text (default) or json
+#   HEART_LOG_ROTATE        size (default), time or none
+#   HEART_LOG_MAX_BYTES     size rotation threshold (default 10 MB)
+#   HEART_LOG_WHEN          time rotation interval, e.g. midnight (default) or H
+#   HEART_LOG_BACKUP_COUNT  rotated files kept (default 5)
+#   HEART_LOG_QUEUE_SIZE    max queued records before dropping (default 10000)
+#   HEART_LOG_SAMPLE        per-module sampling, e.g. "Prediction_pipeline=0.01,micro_batcher=0.1"
 
-log_path = os.path.join(os.getcwd(), "logs")
+LOG_FILE = os.environ.get("HEART_LOG_FILE") or f"{datetime.now().strftime('%Y_%m_%d_%H_%M_%S')}.log"
 
-os.makedirs(log_path, exist_ok=True)
+log_path = os.path.join(os.getcwd(), "logs")
 
 LOG_FILEPATH = os.path.join(log_path, LOG_FILE)
 
-logging.basicConfig(level = logging.INFO, 
-                    filename = LOG_FILEPATH, 
-                    format = "[%(asctime)s] %(lineno)d %(name)s - %(levelname)s - %(message)s")
+TEXT_FORMAT = "[%(asctime)s] %(lineno)d %(name)s - %(levelname)s - %(message)s"
+
+# Attributes every LogRecord has; anything else was passed through extra=
+_RECORD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'module': record.module,
+            'line': record.lineno,
+            'process': record.process,
+            'thread': record.threadName,
+            'message': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS:
+                entry[key] = value
+        if record.exc_text:
+            entry['exception'] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class _BatchFileMixin:
+    # The log directory and file are only created when the first batch is
+    # written, and each batch is flushed once instead of once per record.
+    def _open(self):
+        os.makedirs(os.path.dirname(self.baseFilename), exist_ok=True)
+        return super()._open()
+
+    def emit_batch(self, records):
+        for record in records:
+            try:
+                msg = self.format(record) + self.terminator
+                if self._should_rotate(record, msg):
+                    self.doRollover()
+                if self.stream is None:
+                    self.stream = self._open()
+                self.stream.write(msg)
+            except Exception:
+                self.handleError(record)
+        if self.stream is not None:
+            self.stream.flush()
+
+
+class BatchFileHandler(_BatchFileMixin, logging.FileHandler):
+    def _should_rotate(self, record, msg):
+        return False
+
+
+class BatchRotatingFileHandler(_BatchFileMixin, logging.handlers.RotatingFileHandler):
+    def _should_rotate(self, record, msg):
+        # Same rule as RotatingFileHandler.shouldRollover without formatting twice
+        if self.maxBytes <= 0 or self.stream is None:
+            return False
+        return self.stream.tell() + len(msg) >= self.maxBytes
+
+
+class BatchTimedRotatingFileHandler(_BatchFileMixin, logging.handlers.TimedRotatingFileHandler):
+    def _should_rotate(self, record, msg):
+        return self.shouldRollover(record)
+
+
+def build_file_handler(file_path=LOG_FILEPATH):
+    rotate = os.environ.get("HEART_LOG_ROTATE", "size")
+    backup_count = int(os.environ.get("HEART_LOG_BACKUP_COUNT", 5))
+    if rotate == "size":
+        handler = BatchRotatingFileHandler(file_path, maxBytes=int(os.environ.get("HEART_LOG_MAX_BYTES", 10 * 1024 * 1024)),
+                                           backupCount=backup_count, delay=True)
+    elif rotate == "time":
+        handler = BatchTimedRotatingFileHandler(file_path, when=os.environ.get("HEART_LOG_WHEN", "midnight"),
+                                                backupCount=backup_count, delay=True)
+    else:
+        handler = BatchFileHandler(file_path, delay=True)
+    if os.environ.get("HEART_LOG_FORMAT", "text") == "json":
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(logging.Formatter(TEXT_FORMAT))
+    return handler
+
+
+def parse_sample_rates(spec):
+    rates = {}
+    for item in filter(None, (part.strip() for part in (spec or "").split(","))):
+        module, _, rate = item.partition("=")
+        rates[module.strip()] = float(rate)
+    return rates
+
+
+class SamplingFilter(logging.Filter):
+    # Keeps a fraction of the INFO/DEBUG records of noisy modules; warnings,
+    # errors and anything carrying an exception are always kept.
+    def __init__(self, rates):
+        super().__init__()
+        self.rates = rates
+
+    def filter(self, record):
+        rate = self.rates.get(record.module)
+        if rate is None or record.levelno >= logging.WARNING or record.exc_info:
+            return True
+        return random.random() < rate
+
+
+class AsyncQueueHandler(logging.handlers.QueueHandler):
+    def __init__(self, writer):
+        super().__init__(writer.queue)
+        self.writer = writer
+
+    def prepare(self, record):
+        # Merge args now so later mutation of the arguments cannot change the
+        # message; tracebacks are rendered while the frames still exist.
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        self.writer.put(record)
+
+
+class AsyncLogWriter:
+    def __init__(self, handler, max_queue_size=10000, max_batch=512):
+        self.handler = handler
+        self.max_queue_size = max_queue_size
+        self.max_batch = max_batch
+        self.dropped = 0
+        self._pid = None
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self.queue = queue.Queue(maxsize=max_queue_size)
+
+    def _ensure_started(self):
+        # Forked children (pre-fork workers, pool processes) inherit neither the
+        # writer thread nor a consistent queue, so they start their own.
+        if self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._pid == os.getpid():
+                return
+            if self._pid is not None:
+                self.queue = queue.Queue(maxsize=self.max_queue_size)
+                self.handler.stream = None
+            self._thread = threading.Thread(target=self._run, args=(self.queue,), name='heart-log-writer', daemon=True)
+            self._thread.start()
+            self._pid = os.getpid()
+
+    def put(self, record):
+        self._ensure_started()
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self, records_queue):
+        while True:
+            record = records_queue.get()
+            batch = []
+            stop = record is None
+            if not stop:
+                batch.append(record)
+            # Drain whatever else is already waiting and write it in one go
+            while not stop and len(batch) < self.max_batch:
+                try:
+                    record = records_queue.get_nowait()
+                except queue.Empty:
+                    break
+                if record is None:
+                    stop = True
+                else:
+                    batch.append(record)
+            if batch:
+                with self.handler.lock:
+                    self.handler.emit_batch(batch)
+            if stop:
+                return
+
+    def stop(self, timeout=5.0):
+        if self._pid != os.getpid() or self._thread is None:
+            return
+        try:
+            self.queue.put(None, timeout=timeout)
+        except queue.Full:
+            pass
+        self._thread.join(timeout)
+        self._pid = None
+        self.handler.close()
+
+
+log_writer = AsyncLogWriter(build_file_handler(), max_queue_size=int(os.environ.get("HEART_LOG_QUEUE_SIZE", 10000)))
+atexit.register(log_writer.stop)
+
+queue_handler = AsyncQueueHandler(log_writer)
+queue_handler.addFilter(SamplingFilter(parse_sample_rates(os.environ.get("HEART_LOG_SAMPLE"))))
+
+logging.basicConfig(level = logging.INFO, handlers = [queue_handler])
 
 if __name__ == "__main__":
-    logging.info("This is a test log message")
\ No newline at end of file
+    logging.info("This is a test log message")
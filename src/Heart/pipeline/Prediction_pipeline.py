@@ -1,28 +1,199 @@
 import os
 import sys
-import pandas as pd
+import json
+import math
+import numpy as np
 from src.Heart.logger import logging
-from src.Heart.utils.utils import load_object
 from src.Heart.exception import customexception
+from src.Heart.utils.schema import FEATURE_COLUMNS, check_feature_value
+from src.Heart.utils.result_cache import ResultCache
+from src.Heart.utils.metrics import STAGE_SECONDS, BATCH_SIZE
+from src.Heart.utils.artifact_cache import get_artifact_cache
+
+
+class InvalidRecord:
+    def __init__(self, message):
+        self.message = message
+
+
+def parse_feature_value(column, value):
+    # Missing values are passed through as NaN for the median imputer
+    if value is None or value == '':
+        return math.nan
+    if isinstance(value, bool):
+        raise ValueError(f'{column}: expected a number, got {value!r}')
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f'{column}: expected a number, got {value!r}')
+    if math.isinf(number):
+        raise ValueError(f'{column}: value must be finite')
+    return check_feature_value(column, number)
+
+
+def mapping_feature_values(mapping):
+    # A record must name all 13 features and nothing else: a misspelled or
+    # forgotten key would otherwise be imputed silently. An explicit null (or
+    # '' from a form) marks a value that is genuinely missing.
+    unknown = sorted(key for key in mapping if key not in _FEATURE_INDEX)
+    if unknown:
+        raise ValueError(f'unknown field(s) {unknown}')
+    absent = [column for column in FEATURE_COLUMNS if column not in mapping]
+    if absent:
+        raise ValueError(f'missing field(s) {absent}; send null for a value that is not known')
+    return [mapping[column] for column in FEATURE_COLUMNS]
+
+
+def parse_batch_payload(body):
+    text = body.decode('utf-8') if isinstance(body, bytes) else body
+    stripped = text.lstrip()
+    if stripped.startswith('['):
+        return json.loads(stripped)
+
+    # NDJSON: one record per line, a bad line only invalidates that row
+    records = []
+    for line in text.splitlines():
+        if not line.strip():
+            continue
+        try:
+            records.append(json.loads(line))
+        except ValueError as e:
+            records.append(InvalidRecord(f'invalid JSON: {e}'))
+    return records
+
+
+def build_feature_matrix(records):
+    X = np.full((len(records), len(FEATURE_COLUMNS)), np.nan, dtype=np.float64)
+    valid = np.ones(len(records), dtype=bool)
+    errors = {}
+    for i, record in enumerate(records):
+        try:
+            if isinstance(record, InvalidRecord):
+                raise ValueError(record.message)
+            if not isinstance(record, dict):
+                raise ValueError('record must be a JSON object')
+            row = X[i]
+            for j, (column, value) in enumerate(zip(FEATURE_COLUMNS, mapping_feature_values(record))):
+                row[j] = parse_feature_value(column, value)
+        except ValueError as e:
+            valid[i] = False
+            errors[i] = str(e)
+    return X[valid], np.flatnonzero(valid), errors
+
+_TRANSFORM_SECONDS = STAGE_SECONDS.labels('transform')
+_PREDICT_SECONDS = STAGE_SECONDS.labels('predict')
+_BATCH_ENDPOINT_SIZE = BATCH_SIZE.labels('batch_endpoint')
+
 
 class PredictPipeline:
-    def __init__(self):
-        pass
+    def __init__(self, artifact_cache=None, result_cache=None):
+        self.artifact_cache = artifact_cache or get_artifact_cache()
+        if result_cache is None:
+            result_cache = ResultCache()
+        # A zero-sized cache turns result caching off
+        self.result_cache = result_cache if result_cache.max_entries > 0 else None
     
     def predict(self,features):
         try:
-            preprocessor_path=os.path.join("Artifacts","Preprocessor.pkl")
-            model_path=os.path.join("Artifacts","Model.pkl")
-            preprocessor=load_object(preprocessor_path)
-            model=load_object(model_path)
-            scaled_data=preprocessor.transform(features)
-            pred=model.predict(scaled_data)
+            # Hold one snapshot for the whole call so a concurrent hot reload
+            # never mixes a new preprocessor with an old model.
+            artifacts=self.artifact_cache.get()
+            with _TRANSFORM_SECONDS.time():
+                if artifacts.preprocessor is None:
+                    scaled_data=artifacts.fused_preprocessor.transform(features[FEATURE_COLUMNS].to_numpy(dtype=np.float64))
+                else:
+                    scaled_data=artifacts.preprocessor.transform(features)
+            with _PREDICT_SECONDS.time():
+                pred=artifacts.model.predict(scaled_data)
             return pred
 
         except Exception as e:
             raise customexception(e,sys)
+
+    def _transform_array(self, artifacts, X):
+        with _TRANSFORM_SECONDS.time():
+            if artifacts.fused_preprocessor is not None:
+                return artifacts.fused_preprocessor.transform(X)
+            # pandas is only needed when the sklearn preprocessor is the fallback
+            import pandas as pd
+            return artifacts.preprocessor.transform(pd.DataFrame(X, columns=FEATURE_COLUMNS))
+
+    def _model_predict(self, artifacts, scaled_data):
+        with _PREDICT_SECONDS.time():
+            return artifacts.model.predict(scaled_data)
+
+    def predict_array(self,X):
+        try:
+            artifacts=self.artifact_cache.get()
+            if self.result_cache is None:
+                return self._model_predict(artifacts, self._transform_array(artifacts, X))
+
+            # Only rows not seen under the current model version are scored
+            keys = [self.result_cache.make_key(row, artifacts.version) for row in X]
+            pred = self.result_cache.get_many(keys, artifacts.version)
+            missing = [i for i, value in enumerate(pred) if value is None]
+            if missing:
+                scaled_data = self._transform_array(artifacts, X[missing])
+                missing_pred = self._model_predict(artifacts, scaled_data)
+                self.result_cache.put_many([keys[i] for i in missing], missing_pred, artifacts.version)
+                for i, value in zip(missing, missing_pred):
+                    pred[i] = value
+            return np.asarray(pred)
+        except Exception as e:
+            raise customexception(e,sys)
+
+    def cached_prediction(self,row):
+        if self.result_cache is None:
+            return None
+        try:
+            version = self.artifact_cache.get().version
+            # The miss, if any, is counted once the row is actually scored
+            key = self.result_cache.make_key(row[0], version)
+            value = self.result_cache.get_many([key], version, record_misses=False)[0]
+        except Exception:
+            return None
+        return None if value is None else np.asarray([value])
+
+    def score_array(self,X,artifacts=None):
+        # Predictions plus positive-class probabilities (None when the model has no predict_proba)
+        artifacts = artifacts or self.artifact_cache.get()
+        scaled_data = self._transform_array(artifacts, X)
+        with _PREDICT_SECONDS.time():
+            pred = artifacts.model.predict(scaled_data)
+            proba = None
+            if hasattr(artifacts.model, 'predict_proba'):
+                proba = artifacts.model.predict_proba(scaled_data)[:, 1]
+        return pred, proba
+
+    def predict_batch(self,records):
+        try:
+            artifacts=self.artifact_cache.get()
+            X, row_index, errors = build_feature_matrix(records)
+            _BATCH_ENDPOINT_SIZE.observe(len(records))
+            results = [None] * len(records)
+            for i, message in errors.items():
+                results[i] = {'index': i, 'error': message}
+
+            if len(row_index):
+                # One transform and one predict call for every valid row
+                pred, proba = self.score_array(X, artifacts)
+                for k, i in enumerate(row_index):
+                    result = {'index': int(i), 'prediction': int(pred[k])}
+                    if proba is not None:
+                        result['probability'] = float(proba[k])
+                    results[i] = result
+
+            logging.info(f'Batch prediction: {len(row_index)} rows scored, {len(errors)} rejected')
+            return {'model_version': artifacts.version, 'results': results}
+
+        except Exception as e:
+            raise customexception(e,sys)
     
 class CustomData:
+    # Values live in one contiguous (1, 13) float64 row in FEATURE_COLUMNS
+    # order, so the model can be fed without building a DataFrame.
+    __slots__ = ('_row',)
+
     def __init__(self,
                  age:int,
                  sex:int,
@@ -36,44 +207,49 @@ class CustomData:
                  oldpeak:float,
                  slope:int,
                  ca:int,
-                 thal:int):
-        
-        self.age = age
-        self.sex = sex
-        self.cp = cp
-        self.trestbps = trestbps
-        self.chol = chol
-        self.fbs = fbs
-        self.restecg = restecg
-        self.thalach = thalach
-        self.exang = exang
-        self.oldpeak = oldpeak
-        self.slope = slope
-        self.ca = ca
-        self.thal = thal
-            
-                
+                 thal:int,
+                 out=None):
+        try:
+            values = (age, sex, cp, trestbps, chol, fbs, restecg, thalach, exang, oldpeak, slope, ca, thal)
+            row = np.empty((1, len(FEATURE_COLUMNS)), dtype=np.float64) if out is None else out
+            for j, column in enumerate(FEATURE_COLUMNS):
+                row[0, j] = parse_feature_value(column, values[j])
+            self._row = row
+        except Exception as e:
+            logging.info('Exception Occured in prediction pipeline')
+            raise customexception(e,sys)
+
+    @classmethod
+    def from_mapping(cls, mapping, out=None):
+        # Works for request.form as well as decoded JSON objects
+        return cls(*mapping_feature_values(mapping), out=out)
+
+    def __getattr__(self, name):
+        # Only feature names are looked up in the row; anything else (including
+        # _row itself on an instance being copied or unpickled) is missing
+        if name not in _FEATURE_INDEX:
+            raise AttributeError(name)
+        return self._row[0, _FEATURE_INDEX[name]].item()
+
+    # __slots__ instances have no __dict__, so copy and pickle carry the row explicitly
+    def __getstate__(self):
+        return self._row
+
+    def __setstate__(self, row):
+        self._row = row
+
+    def get_data_as_array(self):
+        return self._row
+
     def get_data_as_dataframe(self):
             try:
-                custom_data_input_dict = {
-                    'age':[self.age],
-                    'sex':[self.sex],
-                    'cp':[self.cp],
-                    'trestbps':[self.trestbps],
-                    'chol':[self.chol],
-                    'fbs':[self.fbs],
-                    'restecg':[self.restecg],
-                    'thalach':[self.thalach],
-                    'exang':[self.exang],
-                    'oldpeak':[self.oldpeak],
-                    'slope':[self.slope],
-                    'ca':[self.ca],
-                    'thal':[self.thal]
-                }
-                df = pd.DataFrame(custom_data_input_dict)
-                print(df)
+                import pandas as pd
+                df = pd.DataFrame(self._row, columns=FEATURE_COLUMNS)
                 logging.info('Dataframe Gathered')
                 return df
             except Exception as e:
                 logging.info('Exception Occured in prediction pipeline')
                 raise customexception(e,sys)
+
+
+_FEATURE_INDEX = {column: j for j, column in enumerate(FEATURE_COLUMNS)}
@@ -1,21 +1,42 @@
+import os
 from src.Heart.components.Data_ingestion import DataIngestion
 from src.Heart.components.Data_transformation import DataTransformation
 from src.Heart.components.Model_trainer import ModelTrainer
 from src.Heart.components.Model_evaluation import ModelEvaluation
+from src.Heart.components.Streaming_trainer import StreamingTrainer
 
 
-#Data ingestion Pipeline
-obj=DataIngestion()
-train_data_path,test_data_path=obj.initiate_data_ingestion()
+if os.environ.get('HEART_TRAINING_MODE') == 'streaming':
+    # Out-of-core mode: training reads the splits in chunks sized for HEART_MAX_RSS_MB.
+    # Ingestion keeps its own fixed chunk size, so both modes get the same split.
+    streaming_trainer=StreamingTrainer()
 
-# Data Transformation Pipeline
-data_transformation=DataTransformation()
-train_arr,test_arr=data_transformation.initialize_data_transformation(train_data_path,test_data_path)
+    obj=DataIngestion()
+    train_data_path,test_data_path=obj.initiate_streaming_ingestion()
 
-# Model Training Pipeline
-model_trainer_obj=ModelTrainer()
-model_trainer_obj.initate_model_training(train_arr,test_arr)
+    data_transformation=DataTransformation()
+    preprocessor,classes=data_transformation.initialize_streaming_transformation(
+        train_data_path,streaming_trainer.streaming_trainer_config.reservoir_size)
 
-# Model Evaluation Pipeline
-model_eval_obj = ModelEvaluation()
-model_eval_obj.initate_model_evaluation(train_arr,test_arr)
\ No newline at end of file
+    streaming_trainer.initiate_streaming_training(train_data_path,test_data_path,preprocessor,classes)
+
+    # Model Evaluation Pipeline, on the test split in training-sized chunks
+    model_eval_obj = ModelEvaluation()
+    model_eval_obj.initiate_streaming_evaluation(test_data_path,streaming_trainer.chunk_rows())
+
+else:
+    #Data ingestion Pipeline
+    obj=DataIngestion()
+    train_data_path,test_data_path=obj.initiate_data_ingestion()
+
+    # Data Transformation Pipeline
+    data_transformation=DataTransformation()
+    train_dataset,test_dataset,preprocessor=data_transformation.initialize_data_transformation(train_data_path,test_data_path)
+
+    # Model Training Pipeline
+    model_trainer_obj=ModelTrainer()
+    model_trainer_obj.initate_model_training(train_dataset,test_dataset,preprocessor,train_data_path)
+
+    # Model Evaluation Pipeline
+    model_eval_obj = ModelEvaluation()
+    model_eval_obj.initate_model_evaluation(test_dataset)
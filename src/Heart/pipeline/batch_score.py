@@ -0,0 +1,155 @@
+import os
+import sys
+import time
+import argparse
+import numpy as np
+import pandas as pd
+from collections import deque
+from dataclasses import dataclass
+from concurrent.futures import ProcessPoolExecutor
+from src.Heart.logger import logging
+from src.Heart.exception import customexception
+from src.Heart.utils.schema import FEATURE_COLUMNS, validate_feature_matrix
+from src.Heart.utils.result_cache import ResultCache
+from src.Heart.utils.artifact_cache import ArtifactCache, ArtifactCacheConfig
+from src.Heart.pipeline.Prediction_pipeline import PredictPipeline
+
+
+@dataclass
+class BatchScoreConfig:
+    chunk_size = 50000
+    workers = os.cpu_count() or 1
+    # Artifact paths follow HEART_MODEL_FORMAT (see ArtifactCacheConfig)
+    model_format = ArtifactCacheConfig.model_format
+
+
+# Each worker process loads the artifacts once and reuses them for every chunk
+_worker_pipeline = None
+
+
+def _init_worker(model_format):
+    global _worker_pipeline
+    cache = ArtifactCache(check_interval=float('inf'), model_format=model_format)
+    _worker_pipeline = PredictPipeline(artifact_cache=cache, result_cache=ResultCache(max_entries=0))
+    cache.get()
+
+
+def _score_chunk(X):
+    return _worker_pipeline.score_array(X)
+
+
+def iter_chunks(input_path, chunk_size, columns):
+    if input_path.endswith('.parquet'):
+        import pyarrow.parquet as pq
+
+        parquet_file = pq.ParquetFile(input_path)
+        for batch in parquet_file.iter_batches(batch_size=chunk_size, columns=columns):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(input_path, chunksize=chunk_size, usecols=columns)
+
+
+def chunk_to_matrix(chunk):
+    # Non-numeric or out-of-range cells fail loudly instead of being imputed as missing
+    features = chunk[FEATURE_COLUMNS].apply(pd.to_numeric)
+    return validate_feature_matrix(np.ascontiguousarray(features.to_numpy(dtype=np.float64)))
+
+
+class OutputWriter:
+    def __init__(self, output_path):
+        self.output_path = output_path
+        self._parquet_writer = None
+        self._wrote_header = False
+        os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+        if not output_path.endswith('.parquet') and os.path.exists(output_path):
+            os.remove(output_path)
+
+    def write(self, frame):
+        if self.output_path.endswith('.parquet'):
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            table = pa.Table.from_pandas(frame, preserve_index=False)
+            if self._parquet_writer is None:
+                self._parquet_writer = pq.ParquetWriter(self.output_path, table.schema)
+            self._parquet_writer.write_table(table)
+        else:
+            frame.to_csv(self.output_path, mode='a', header=not self._wrote_header, index=False)
+            self._wrote_header = True
+
+    def close(self):
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+
+
+def batch_score(input_path, output_path, chunk_size=None, workers=None, id_column=None):
+    config = BatchScoreConfig()
+    chunk_size = chunk_size or config.chunk_size
+    workers = workers or config.workers
+    # At most two chunks per worker are queued or being written at any time,
+    # which keeps memory flat however large the input is.
+    max_in_flight = 2 * workers
+    columns = FEATURE_COLUMNS + ([id_column] if id_column else [])
+
+    try:
+        logging.info(f'Batch scoring {input_path} -> {output_path} ({workers} workers, chunks of {chunk_size})')
+        start = time.perf_counter()
+        writer = OutputWriter(output_path)
+        pending = deque()
+        rows = 0
+
+        def write_next():
+            nonlocal rows
+            first_row, ids, future = pending.popleft()
+            pred, proba = future.result()
+            frame = pd.DataFrame({'row': np.arange(first_row, first_row + len(pred))})
+            if ids is not None:
+                frame[id_column] = ids
+            frame['prediction'] = pred.astype(np.int64)
+            if proba is not None:
+                frame['probability'] = proba
+            writer.write(frame)
+            rows += len(pred)
+
+        with ProcessPoolExecutor(
+                max_workers=workers,
+                initializer=_init_worker,
+                initargs=(config.model_format,)) as executor:
+            next_row = 0
+            for chunk in iter_chunks(input_path, chunk_size, columns):
+                X = chunk_to_matrix(chunk)
+                ids = chunk[id_column].to_numpy() if id_column else None
+                pending.append((next_row, ids, executor.submit(_score_chunk, X)))
+                next_row += len(X)
+                # Results are written strictly in input order
+                while len(pending) >= max_in_flight:
+                    write_next()
+            while pending:
+                write_next()
+
+        writer.close()
+        elapsed = time.perf_counter() - start
+        logging.info(f'Batch scoring done: {rows} rows in {elapsed:.2f}s')
+        return rows, elapsed
+
+    except Exception as e:
+        logging.info('Exception occured during batch scoring')
+        raise customexception(e,sys)
+
+
+def main(argv=None):
+    config = BatchScoreConfig()
+    parser = argparse.ArgumentParser(description='Score a large CSV/Parquet patient extract in parallel chunks.')
+    parser.add_argument('input', help='input .csv or .parquet file with the 13 feature columns')
+    parser.add_argument('output', help='output .csv or .parquet file')
+    parser.add_argument('--chunk-size', type=int, default=config.chunk_size, help='rows per chunk')
+    parser.add_argument('--workers', type=int, default=config.workers, help='scoring processes')
+    parser.add_argument('--id-column', default=None, help='input column copied to the output next to each prediction')
+    args = parser.parse_args(argv)
+
+    rows, elapsed = batch_score(args.input, args.output, args.chunk_size, args.workers, args.id_column)
+    print(f'Scored {rows} rows in {elapsed:.2f}s ({rows / max(elapsed, 1e-9):,.0f} rows/s) -> {args.output}')
+
+
+if __name__ == '__main__':
+    main()
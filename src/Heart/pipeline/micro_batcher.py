@@ -0,0 +1,140 @@
+import os
+import sys
+import time
+import threading
+import numpy as np
+from collections import deque
+from dataclasses import dataclass
+from src.Heart.logger import logging
+from src.Heart.exception import customexception
+from src.Heart.utils.metrics import BATCH_SIZE
+from src.Heart.pipeline.Prediction_pipeline import PredictPipeline
+
+
+@dataclass
+class MicroBatcherConfig:
+    max_batch_size = int(os.environ.get('HEART_MAX_BATCH_SIZE', 64))
+    max_wait_ms = float(os.environ.get('HEART_MAX_BATCH_WAIT_MS', 2.0))
+
+
+_MICRO_BATCH_SIZE = BATCH_SIZE.labels('micro_batch')
+
+
+class _PendingPrediction:
+    __slots__ = ('row', 'event', 'result', 'error')
+
+    def __init__(self, row):
+        self.row = row
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class MicroBatcher:
+    def __init__(self, predict_pipeline=None, max_batch_size=None, max_wait_ms=None):
+        config = MicroBatcherConfig()
+        self.predict_pipeline = predict_pipeline or PredictPipeline()
+        self.max_batch_size = max(1, max_batch_size or config.max_batch_size)
+        self.max_wait = (config.max_wait_ms if max_wait_ms is None else max_wait_ms) / 1000.0
+
+        self._cond = threading.Condition()
+        self._pending = deque()
+        self._active = 0
+        self._worker = None
+
+        self._passthrough = 0
+        self._batches = 0
+        self._batched_rows = 0
+        self._max_batch_seen = 0
+        self._batch_sizes = {}
+
+    def predict(self, row):
+        # Drop-in for PredictPipeline.predict_array on a single (1, 13) row
+        cached = self.predict_pipeline.cached_prediction(row)
+        if cached is not None:
+            return cached
+
+        with self._cond:
+            # Nothing queued or running: a lone request goes straight through
+            # instead of paying the batching wait.
+            direct = self.max_batch_size == 1 or (not self._pending and self._active == 0)
+            if direct:
+                self._active += 1
+                self._passthrough += 1
+                _MICRO_BATCH_SIZE.observe(1)
+            else:
+                item = _PendingPrediction(row)
+                self._pending.append(item)
+                self._ensure_worker()
+                self._cond.notify()
+
+        if direct:
+            try:
+                return self.predict_pipeline.predict_array(row)
+            finally:
+                with self._cond:
+                    self._active -= 1
+                    self._cond.notify()
+
+        item.event.wait()
+        if item.error is not None:
+            raise item.error
+        return item.result
+
+    def _ensure_worker(self):
+        if self._worker is None or not self._worker.is_alive():
+            self._worker = threading.Thread(target=self._run, name='heart-micro-batcher', daemon=True)
+            self._worker.start()
+
+    def _next_batch(self):
+        with self._cond:
+            while not self._pending:
+                self._cond.wait()
+            deadline = time.monotonic() + self.max_wait
+            while len(self._pending) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            size = min(len(self._pending), self.max_batch_size)
+            batch = [self._pending.popleft() for _ in range(size)]
+            self._active += 1
+            return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            _MICRO_BATCH_SIZE.observe(len(batch))
+            try:
+                X = np.concatenate([item.row for item in batch])
+                pred = self.predict_pipeline.predict_array(X)
+                for k, item in enumerate(batch):
+                    item.result = pred[k:k + 1]
+            except Exception as e:
+                logging.info(f'Micro-batch of {len(batch)} rows failed: {e}')
+                error = e if isinstance(e, customexception) else customexception(e,sys)
+                for item in batch:
+                    item.error = error
+            finally:
+                with self._cond:
+                    self._active -= 1
+                    self._batches += 1
+                    self._batched_rows += len(batch)
+                    self._max_batch_seen = max(self._max_batch_seen, len(batch))
+                    self._batch_sizes[len(batch)] = self._batch_sizes.get(len(batch), 0) + 1
+                for item in batch:
+                    item.event.set()
+
+    def stats(self):
+        with self._cond:
+            return {
+                'queue_depth': len(self._pending),
+                'max_batch_size': self.max_batch_size,
+                'max_wait_ms': self.max_wait * 1000.0,
+                'passthrough_requests': self._passthrough,
+                'batches': self._batches,
+                'batched_rows': self._batched_rows,
+                'mean_batch_size': self._batched_rows / self._batches if self._batches else 0.0,
+                'largest_batch': self._max_batch_seen,
+                'batch_size_counts': dict(sorted(self._batch_sizes.items())),
+            }
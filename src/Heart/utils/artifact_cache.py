@@ -0,0 +1,216 @@
+import io
+import os
+import sys
+import time
+import pickle
+import hashlib
+import weakref
+import threading
+from dataclasses import dataclass
+from src.Heart.logger import logging
+from src.Heart.exception import customexception
+from src.Heart.utils.model_export import HEADER_FILE, load_exported_model
+from src.Heart.utils.inference_bundle import load_bundle
+from src.Heart.utils.fused_preprocessor import compile_preprocessor, load_fused_preprocessor
+
+
+@dataclass
+class ArtifactCacheConfig:
+    preprocessor_obj_file_path = os.path.join('Artifacts','Preprocessor.pkl')
+    trained_model_file_path = os.path.join('Artifacts','Model.pkl')
+    fused_preprocessor_file_path = os.path.join('Artifacts','Preprocessor.npz')
+    exported_model_dir_path = os.path.join('Artifacts','Model_arrays')
+    inference_bundle_file_path = os.path.join('Artifacts','Inference_bundle.bin')
+    # 'bundle' serves Inference_bundle.bin (preprocessor and model in one file);
+    # 'pickle' serves Preprocessor.pkl/Model.pkl; 'arrays' serves the pickle-free
+    # Preprocessor.npz and memory-mapped Model_arrays export instead
+    model_format = os.environ.get('HEART_MODEL_FORMAT', 'bundle')
+    # Seconds between stat() checks of the artifact files
+    check_interval = float(os.environ.get('HEART_ARTIFACT_CHECK_INTERVAL', 2.0))
+
+
+@dataclass(frozen=True)
+class LoadedArtifacts:
+    preprocessor: object
+    fused_preprocessor: object
+    model: object
+    version: str
+    loaded_at: float
+    load_seconds: float
+    # Bundle header (schema, library versions, training metadata); None for the other formats
+    metadata: object = None
+
+
+class ArtifactCache:
+    def __init__(self, preprocessor_path=None, model_path=None, check_interval=None, model_format=None, bundle_path=None):
+        config = ArtifactCacheConfig()
+        self.model_format = model_format or config.model_format
+        self.bundle_path = bundle_path or config.inference_bundle_file_path
+        if self.model_format == 'bundle':
+            if preprocessor_path or model_path:
+                self.model_format = 'pickle'
+            elif not os.path.exists(self.bundle_path) and os.path.exists(config.trained_model_file_path):
+                # Artifacts trained before the bundle existed
+                logging.info(f'No inference bundle at {self.bundle_path}, serving Preprocessor.pkl/Model.pkl')
+                self.model_format = 'pickle'
+        if self.model_format == 'bundle':
+            self.preprocessor_path = self.model_path = None
+            self.artifact_paths = (self.bundle_path,)
+        elif self.model_format == 'arrays':
+            self.preprocessor_path = preprocessor_path or config.fused_preprocessor_file_path
+            self.model_path = model_path or os.path.join(config.exported_model_dir_path, HEADER_FILE)
+        elif self.model_format == 'pickle':
+            self.preprocessor_path = preprocessor_path or config.preprocessor_obj_file_path
+            self.model_path = model_path or config.trained_model_file_path
+        else:
+            raise customexception(ValueError(f'Unknown model format {self.model_format!r}'), sys)
+        if self.model_format != 'bundle':
+            self.artifact_paths = (self.preprocessor_path, self.model_path)
+        self.check_interval = config.check_interval if check_interval is None else check_interval
+
+        self._lock = threading.Lock()
+        self._current = None
+        self._signature = None
+        self._next_check = 0.0
+
+        # A pre-fork master may be inside get() on another thread when it
+        # forks; the child must not inherit that lock in the held state.
+        if hasattr(os, 'register_at_fork'):
+            ref = weakref.ref(self)
+            os.register_at_fork(after_in_child=lambda: ref() is not None and ref()._reset_lock())
+
+    def _reset_lock(self):
+        self._lock = threading.Lock()
+
+    def _stat_signature(self):
+        signature = []
+        for path in self.artifact_paths:
+            st = os.stat(path)
+            signature.append((st.st_mtime_ns, st.st_size))
+        return tuple(signature)
+
+    def _compile(self, preprocessor):
+        try:
+            return compile_preprocessor(preprocessor)
+        except customexception as e:
+            # Unknown preprocessor layouts still serve through sklearn
+            logging.info(f'Serving without the fused preprocessor: {e}')
+            return None
+
+    def _load_bundle(self, start):
+        # One read of one file: the preprocessor and the model can never come
+        # from different training runs
+        with open(self.bundle_path, 'rb') as file_obj:
+            bundle_bytes = file_obj.read()
+        version = hashlib.sha256(bundle_bytes).hexdigest()[:16]
+        if self._current is not None and self._current.version == version:
+            return self._current
+
+        # Schema, library versions and payload digest are checked before unpickling
+        bundle = load_bundle(self.bundle_path, data=bundle_bytes)
+        artifacts = LoadedArtifacts(
+            preprocessor=bundle.preprocessor,
+            fused_preprocessor=self._compile(bundle.preprocessor),
+            model=bundle.model,
+            version=version,
+            loaded_at=time.time(),
+            load_seconds=time.perf_counter() - start,
+            metadata=bundle.header)
+        logging.info(f"Loaded inference bundle version {version} ({bundle.header['estimator']}, "
+                     f"created {bundle.header['created_at']}) in {artifacts.load_seconds:.3f}s")
+        return artifacts
+
+    def _load(self):
+        start = time.perf_counter()
+        if self.model_format == 'bundle':
+            return self._load_bundle(start)
+        with open(self.preprocessor_path, 'rb') as file_obj:
+            preprocessor_bytes = file_obj.read()
+        with open(self.model_path, 'rb') as file_obj:
+            model_bytes = file_obj.read()
+
+        # Version is derived from the exact bytes that get loaded, so a file
+        # replaced between hashing and loading can never be mislabelled. In the
+        # arrays format the header carries a digest of every array it names.
+        digest = hashlib.sha256()
+        digest.update(hashlib.sha256(preprocessor_bytes).digest())
+        digest.update(hashlib.sha256(model_bytes).digest())
+        version = digest.hexdigest()[:16]
+
+        if self._current is not None and self._current.version == version:
+            return self._current
+
+        if self.model_format == 'arrays':
+            # Nothing is unpickled: the preprocessor is plain arrays and the
+            # model parameters stay memory-mapped and shared between processes
+            preprocessor = None
+            fused_preprocessor = load_fused_preprocessor(io.BytesIO(preprocessor_bytes))
+            model = load_exported_model(os.path.dirname(self.model_path), header_bytes=model_bytes)
+        else:
+            preprocessor = pickle.loads(preprocessor_bytes)
+            fused_preprocessor = self._compile(preprocessor)
+            model = pickle.loads(model_bytes)
+
+        artifacts = LoadedArtifacts(
+            preprocessor=preprocessor,
+            fused_preprocessor=fused_preprocessor,
+            model=model,
+            version=version,
+            loaded_at=time.time(),
+            load_seconds=time.perf_counter() - start)
+        logging.info(f'Loaded artifacts version {version} in {artifacts.load_seconds:.3f}s')
+        return artifacts
+
+    def get(self):
+        current = self._current
+        if current is not None and time.monotonic() < self._next_check:
+            return current
+
+        with self._lock:
+            if self._current is not None and time.monotonic() < self._next_check:
+                return self._current
+            try:
+                signature = self._stat_signature()
+                if self._current is None or signature != self._signature:
+                    # Readers holding the previous LoadedArtifacts keep using it;
+                    # only new calls to get() observe the swapped reference.
+                    self._current = self._load()
+                    self._signature = signature
+            except Exception as e:
+                if self._current is None:
+                    logging.info('Exception occured while loading the artifacts')
+                    raise customexception(e,sys)
+                # A half-written artifact (e.g. training still running) keeps
+                # the last good version in service until the next check.
+                logging.info(f'Artifact reload failed, keeping version {self._current.version}: {e}')
+            self._next_check = time.monotonic() + self.check_interval
+            return self._current
+
+    @property
+    def current(self):
+        # Last loaded artifacts without triggering a check or a load
+        return self._current
+
+    def refresh(self):
+        with self._lock:
+            self._next_check = 0.0
+        return self.get()
+
+    def stop_watching(self):
+        # Keeps serving the loaded version without ever checking for changes
+        with self._lock:
+            self.check_interval = float('inf')
+            self._next_check = float('inf')
+
+
+_shared_cache = None
+_shared_cache_lock = threading.Lock()
+
+
+def get_artifact_cache():
+    global _shared_cache
+    if _shared_cache is None:
+        with _shared_cache_lock:
+            if _shared_cache is None:
+                _shared_cache = ArtifactCache()
+    return _shared_cache
@@ -0,0 +1,59 @@
+import os
+import sys
+import numpy as np
+from dataclasses import dataclass
+from src.Heart.logger import logging
+from src.Heart.exception import customexception
+from src.Heart.utils.schema import FEATURE_COLUMNS, TRAINING_DTYPE
+
+
+@dataclass(frozen=True)
+class Dataset:
+    # Features and target as separate buffers: X is one C-contiguous
+    # (rows, features) block and y is its own vector, so stages hand the same
+    # arrays to every estimator without gluing them together and slicing them apart.
+    X: np.ndarray
+    y: np.ndarray
+
+    def __post_init__(self):
+        if self.X.ndim != 2 or not self.X.flags.c_contiguous:
+            raise ValueError('X must be a C-contiguous 2D array')
+        if self.y.shape != (self.X.shape[0],):
+            raise ValueError(f'y has shape {self.y.shape}, expected ({self.X.shape[0]},)')
+
+    def __len__(self):
+        return self.X.shape[0]
+
+    @property
+    def nbytes(self):
+        return self.X.nbytes + self.y.nbytes
+
+    @staticmethod
+    def allocate_features(dir_path, n_rows, dtype=TRAINING_DTYPE):
+        # X.npy preallocated on disk and mapped writable: stages fill it in place,
+        # and the pages are file-backed rather than anonymous memory
+        os.makedirs(dir_path, exist_ok=True)
+        return np.lib.format.open_memmap(os.path.join(dir_path, 'X.npy'), mode='w+',
+                                         dtype=dtype, shape=(n_rows, len(FEATURE_COLUMNS)))
+
+    @classmethod
+    def save(cls, dir_path, X, y):
+        try:
+            os.makedirs(dir_path, exist_ok=True)
+            X_path = os.path.join(dir_path, 'X.npy')
+            if isinstance(X, np.memmap) and os.path.abspath(X.filename) == os.path.abspath(X_path):
+                X.flush()
+            else:
+                np.save(X_path, np.ascontiguousarray(X), allow_pickle=False)
+            np.save(os.path.join(dir_path, 'y.npy'), np.ascontiguousarray(y), allow_pickle=False)
+            return cls.load(dir_path)
+        except Exception as e:
+            logging.info('Exception occured while saving the dataset')
+            raise customexception(e,sys)
+
+    @classmethod
+    def load(cls, dir_path, mmap=True):
+        # Read-only memory maps: forked training workers share the same pages
+        mode = 'r' if mmap else None
+        return cls(X=np.load(os.path.join(dir_path, 'X.npy'), mmap_mode=mode, allow_pickle=False),
+                   y=np.load(os.path.join(dir_path, 'y.npy'), mmap_mode=mode, allow_pickle=False))
@@ -0,0 +1,120 @@
+import os
+import sys
+import json
+import pickle
+import hashlib
+import platform
+import importlib
+import numpy as np
+from dataclasses import dataclass
+from src.Heart.logger import logging
+from src.Heart.exception import customexception
+
+
+@dataclass
+class FitCacheConfig:
+    cache_dir_path = os.path.join('Artifacts','fit_cache')
+    # Total size of the cached fits; least recently used entries are evicted beyond it
+    max_bytes = int(os.environ.get('HEART_FIT_CACHE_MAX_BYTES', 512 * 1024 * 1024))
+    # HEART_FIT_CACHE=0 refits every model on every run
+    enabled = os.environ.get('HEART_FIT_CACHE', '1') != '0'
+
+
+def _library_version(module_name):
+    try:
+        return getattr(importlib.import_module(module_name), '__version__', 'unknown')
+    except ImportError:
+        return None
+
+
+class FitCache:
+    def __init__(self, cache_dir_path=None, max_bytes=None):
+        config = FitCacheConfig()
+        self.cache_dir_path = cache_dir_path or config.cache_dir_path
+        self.max_bytes = config.max_bytes if max_bytes is None else max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def data_digest(*arrays):
+        digest = hashlib.sha256()
+        for array in arrays:
+            array = np.ascontiguousarray(array)
+            digest.update(f'{array.dtype.str}{array.shape}'.encode())
+            # Hashed through the buffer protocol, without a bytes copy of the data
+            digest.update(array.reshape(-1).view(np.uint8))
+        return digest.hexdigest()
+
+    def key(self, model, data_digest):
+        # A fit is reused only for the same data, estimator class, hyperparameters
+        # and the versions of every library that could change the fitted result
+        estimator_class = f'{type(model).__module__}.{type(model).__qualname__}'
+        params = model.get_params(deep=True) if hasattr(model, 'get_params') else {}
+        versions = {
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'sklearn': _library_version('sklearn'),
+            type(model).__module__.split('.')[0]: _library_version(type(model).__module__.split('.')[0]),
+        }
+        payload = json.dumps([data_digest, estimator_class, params, versions], sort_keys=True, default=repr)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir_path, f'{key}.pkl')
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as file_obj:
+                entry = pickle.load(file_obj)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except Exception as e:
+            # A corrupt or incompatible entry is dropped and refitted
+            logging.info(f'Discarding unreadable fit cache entry {key}: {e}')
+            self._remove(path)
+            self.misses += 1
+            return None
+        # The modification time doubles as the LRU access time
+        os.utime(path)
+        self.hits += 1
+        return entry
+
+    def put(self, key, entry):
+        try:
+            os.makedirs(self.cache_dir_path, exist_ok=True)
+            path = self._path(key)
+            tmp_path = f'{path}.{os.getpid()}.tmp'
+            with open(tmp_path, 'wb') as file_obj:
+                pickle.dump(entry, file_obj)
+            os.replace(tmp_path, path)
+            self.evict()
+        except Exception as e:
+            logging.info('Exception occured while writing the fit cache')
+            raise customexception(e,sys)
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def evict(self):
+        entries = []
+        for file_name in os.listdir(self.cache_dir_path):
+            if file_name.endswith('.pkl'):
+                st = os.stat(os.path.join(self.cache_dir_path, file_name))
+                entries.append((st.st_mtime_ns, st.st_size, file_name))
+        total = sum(size for _, size, _ in entries)
+        for _, size, file_name in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            self._remove(os.path.join(self.cache_dir_path, file_name))
+            total -= size
+            logging.info(f'Evicted fit cache entry {file_name}')
+
+    def clear(self):
+        if os.path.isdir(self.cache_dir_path):
+            for file_name in os.listdir(self.cache_dir_path):
+                self._remove(os.path.join(self.cache_dir_path, file_name))
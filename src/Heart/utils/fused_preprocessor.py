@@ -0,0 +1,110 @@
+import os
+import sys
+import numpy as np
+from dataclasses import dataclass
+from src.Heart.logger import logging
+from src.Heart.exception import customexception
+from src.Heart.utils.schema import FEATURE_COLUMNS
+
+# Rows transformed per step; bounds the NaN mask to about 1 MB
+TRANSFORM_BLOCK_ROWS = 65536
+
+
+@dataclass(frozen=True)
+class FusedPreprocessor:
+    columns: tuple
+    fill: np.ndarray
+    offset: np.ndarray
+    scale: np.ndarray
+
+    def transform(self, X, out=None):
+        # Same operations, in the same order, as SimpleImputer followed by
+        # StandardScaler (X[nan] = fill; X -= mean_; X /= scale_) with the
+        # parameters cast to the buffer dtype like sklearn does, so float64 and
+        # float32 rows come out bit-identical to Preprocessor.pkl. Works in place
+        # in out, one block of rows at a time, so the only temporary is that
+        # block's NaN mask.
+        X = np.asarray(X)
+        if X.dtype.kind != 'f':
+            X = X.astype(np.float64)
+        dtype = X.dtype
+        if out is None:
+            out = np.empty(X.shape, dtype=dtype)
+        fill, offset, scale = (a.astype(dtype, copy=False) for a in (self.fill, self.offset, self.scale))
+        in_place = np.may_share_memory(X, out)
+        for start in range(0, len(X), TRANSFORM_BLOCK_ROWS):
+            block = out[start:start + TRANSFORM_BLOCK_ROWS]
+            if not in_place:
+                np.copyto(block, X[start:start + TRANSFORM_BLOCK_ROWS])
+            np.copyto(block, fill, where=np.isnan(block))
+            np.subtract(block, offset, out=block)
+            np.divide(block, scale, out=block)
+        return out
+
+
+def compile_preprocessor(preprocessor):
+    try:
+        from sklearn.pipeline import Pipeline
+        from sklearn.impute import SimpleImputer
+        from sklearn.compose import ColumnTransformer
+        from sklearn.preprocessing import StandardScaler
+
+        if not isinstance(preprocessor, ColumnTransformer):
+            raise ValueError(f'expected a ColumnTransformer, got {type(preprocessor).__name__}')
+
+        fitted = [t for t in preprocessor.transformers_ if t[1] != 'drop']
+        if len(fitted) != 1:
+            raise ValueError('expected exactly one fitted transformer')
+        _, pipeline, columns = fitted[0]
+        if list(columns) != FEATURE_COLUMNS:
+            raise ValueError(f'preprocessor columns {list(columns)} do not match the feature schema')
+
+        if not isinstance(pipeline, Pipeline) or len(pipeline.steps) != 2:
+            raise ValueError('expected an imputer followed by a scaler')
+        imputer, scaler = pipeline.steps[0][1], pipeline.steps[1][1]
+        if not isinstance(imputer, SimpleImputer) or imputer.add_indicator or not np.isnan(imputer.missing_values):
+            raise ValueError('unsupported imputer configuration')
+        if not isinstance(scaler, StandardScaler):
+            raise ValueError('unsupported scaler')
+
+        n_features = len(FEATURE_COLUMNS)
+        offset = scaler.mean_ if scaler.with_mean else np.zeros(n_features)
+        scale = scaler.scale_ if scaler.with_std else np.ones(n_features)
+        return FusedPreprocessor(
+            columns=tuple(FEATURE_COLUMNS),
+            fill=np.ascontiguousarray(imputer.statistics_, dtype=np.float64),
+            offset=np.ascontiguousarray(offset, dtype=np.float64),
+            scale=np.ascontiguousarray(scale, dtype=np.float64))
+
+    except Exception as e:
+        logging.info('Exception occured while compiling the preprocessor')
+        raise customexception(e,sys)
+
+
+def save_fused_preprocessor(file_path, fused):
+    try:
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        with open(file_path, 'wb') as file_obj:
+            np.savez(file_obj,
+                     columns=np.array(fused.columns),
+                     fill=fused.fill,
+                     offset=fused.offset,
+                     scale=fused.scale)
+    except Exception as e:
+        raise customexception(e,sys)
+
+
+def load_fused_preprocessor(file_path):
+    try:
+        with np.load(file_path, allow_pickle=False) as data:
+            columns = tuple(str(c) for c in data['columns'])
+            if list(columns) != FEATURE_COLUMNS:
+                raise ValueError(f'{file_path} columns {list(columns)} do not match the feature schema')
+            return FusedPreprocessor(
+                columns=columns,
+                fill=data['fill'],
+                offset=data['offset'],
+                scale=data['scale'])
+    except Exception as e:
+        logging.info('Exception Occured in load_fused_preprocessor')
+        raise customexception(e,sys)
@@ -0,0 +1,155 @@
+import os
+import sys
+import json
+import time
+import pickle
+import hashlib
+import platform
+import importlib
+from dataclasses import dataclass
+from src.Heart.logger import logging
+from src.Heart.exception import customexception
+from src.Heart.utils.schema import FEATURE_COLUMNS, FEATURE_SCHEMA, TARGET_COLUMN
+from src.Heart.utils.split_store import read_schema, split_digest
+
+# The serving unit: one file holding the fitted preprocessor and the selected
+# model together, so they can never be swapped independently. The first line
+# is a JSON header (feature schema, library versions, payload digest and the
+# training metadata), the rest is the pickled payload. Loading reads the file
+# once and checks the header before anything is unpickled.
+#
+#   head -n 1 Artifacts/Inference_bundle.bin | python -m json.tool
+
+FORMAT_NAME = 'heart-inference-bundle'
+FORMAT_VERSION = 1
+
+
+class BundleCompatibilityError(ValueError):
+    pass
+
+
+@dataclass(frozen=True)
+class InferenceBundle:
+    preprocessor: object
+    model: object
+    header: dict
+
+    @property
+    def metadata(self):
+        return self.header['metadata']
+
+
+def _library_version(module_name):
+    try:
+        return getattr(importlib.import_module(module_name), '__version__', 'unknown')
+    except ImportError:
+        return None
+
+
+def library_versions(model):
+    # Every library the payload needs to unpickle: sklearn for the preprocessor,
+    # plus the model's own package (xgboost, catboost, ...)
+    modules = {'numpy', 'sklearn', type(model).__module__.split('.')[0]}
+    return {name: _library_version(name) for name in sorted(modules)}
+
+
+def _same_release(name, saved, installed):
+    # Pickles are only supported within a minor release (major for numpy)
+    parts = 1 if name == 'numpy' else 2
+    return installed is not None and saved.split('.')[:parts] == installed.split('.')[:parts]
+
+
+def training_metadata(model_name, selection, train_path):
+    # What the trainers record about the selected model and the data behind it
+    result = selection['candidates'][model_name]
+    return {
+        'model_name': model_name,
+        'metrics': {key: value for key, value in result.items() if key not in ('status', 'error', 'cached')},
+        'selection': {'policy': selection['policy'], 'reason': selection['reason']},
+        'training_data': {'path': train_path, 'rows': read_schema(train_path)['rows'], 'sha256': split_digest(train_path)},
+    }
+
+
+def save_bundle(file_path, preprocessor, model, metadata):
+    try:
+        payload = pickle.dumps({'preprocessor': preprocessor, 'model': model}, protocol=pickle.HIGHEST_PROTOCOL)
+        header = {
+            'format': FORMAT_NAME,
+            'format_version': FORMAT_VERSION,
+            'created_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+            'estimator': f'{type(model).__module__}.{type(model).__name__}',
+            'feature_columns': FEATURE_COLUMNS,
+            'feature_schema': {column: list(FEATURE_SCHEMA[column]) for column in FEATURE_COLUMNS},
+            'target_column': TARGET_COLUMN,
+            'python': platform.python_version(),
+            'libraries': library_versions(model),
+            'payload_bytes': len(payload),
+            'payload_sha256': hashlib.sha256(payload).hexdigest(),
+            'metadata': metadata,
+        }
+        header_line = json.dumps(header, default=float).encode() + b'\n'
+
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        # Replaced atomically, so a serving process polling for changes only
+        # ever reads a complete bundle
+        tmp_path = f'{file_path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'wb') as file_obj:
+            file_obj.write(header_line)
+            file_obj.write(payload)
+        os.replace(tmp_path, file_path)
+        logging.info(f'Inference bundle saved to {file_path}')
+        return header
+    except Exception as e:
+        logging.info('Exception occured while saving the inference bundle')
+        raise customexception(e,sys)
+
+
+def read_header(data):
+    # (header, payload offset) from the bytes of a bundle
+    end = data.find(b'\n')
+    try:
+        header = json.loads(data[:end]) if end > 0 else None
+    except ValueError:
+        header = None
+    if not isinstance(header, dict) or header.get('format') != FORMAT_NAME:
+        raise BundleCompatibilityError(f'not a {FORMAT_NAME} file')
+    return header, end + 1
+
+
+def check_compatibility(header):
+    problems = []
+    if header.get('format_version') != FORMAT_VERSION:
+        problems.append(f"format version {header.get('format_version')}, expected {FORMAT_VERSION}")
+    if header.get('feature_columns') != FEATURE_COLUMNS:
+        problems.append(f"trained on columns {header.get('feature_columns')}, serving expects {FEATURE_COLUMNS}")
+    schema = header.get('feature_schema') or {}
+    changed = [column for column in FEATURE_COLUMNS if schema.get(column) != list(FEATURE_SCHEMA[column])]
+    if changed:
+        problems.append(f'feature schema differs for {changed}')
+    if header.get('target_column') != TARGET_COLUMN:
+        problems.append(f"target column {header.get('target_column')!r}, expected {TARGET_COLUMN!r}")
+    for name, saved in (header.get('libraries') or {}).items():
+        installed = _library_version(name)
+        if not _same_release(name, saved, installed):
+            problems.append(f'{name} {saved} was used for training, {installed or "none"} is installed')
+    if problems:
+        raise BundleCompatibilityError('incompatible inference bundle: ' + '; '.join(problems))
+    return header
+
+
+def load_bundle(file_path, data=None):
+    # data: the bundle's bytes when the caller has already read the file
+    try:
+        if data is None:
+            with open(file_path, 'rb') as file_obj:
+                data = file_obj.read()
+        header, offset = read_header(data)
+        check_compatibility(header)
+        payload = memoryview(data)[offset:]
+        if len(payload) != header['payload_bytes'] or hashlib.sha256(payload).hexdigest() != header['payload_sha256']:
+            raise BundleCompatibilityError(f'{file_path} is truncated or corrupted')
+        content = pickle.loads(payload)
+        return InferenceBundle(preprocessor=content['preprocessor'], model=content['model'], header=header)
+    except Exception as e:
+        logging.info('Exception occured while loading the inference bundle')
+        raise customexception(e,sys)
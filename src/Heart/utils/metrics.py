@@ -0,0 +1,216 @@
+import time
+import bisect
+import threading
+from src.Heart.logger import logging
+
+# Minimal Prometheus text-format instrumentation. Hot-path calls are a dict
+# lookup done once at import (labels()) plus a lock-protected add, so they
+# cost about a microsecond and can stay on in production.
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+DEFAULT_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024, 4096, 10000)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labelnames, labelvalues, extra=()):
+    pairs = list(zip(labelnames, labelvalues)) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (f'{name}="{_escape(value)}"' for name, value in pairs)
+    return '{' + ','.join(escaped) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = ''
+
+    def __init__(self, name, documentation, labelnames=(), registry=None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._children = {}
+        (registry or REGISTRY).register(self)
+
+    def labels(self, *labelvalues):
+        key = tuple(str(value) for value in labelvalues)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+        for labelvalues, child in sorted(self._children.items()):
+            lines.extend(child.render(self.name, self.labelnames, labelvalues))
+        return lines
+
+
+class _CounterChild:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.value = 0
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+    def set(self, value):
+        with self._lock:
+            self.value = value
+
+    def render(self, name, labelnames, labelvalues):
+        return [f'{name}{_format_labels(labelnames, labelvalues)} {_format_value(self.value)}']
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount=1):
+        self.labels().inc(amount)
+
+
+class Gauge(Counter):
+    kind = 'gauge'
+
+    def set(self, value):
+        self.labels().set(value)
+
+
+class _HistogramChild:
+    def __init__(self, buckets):
+        self._lock = threading.Lock()
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+    def time(self):
+        return _Timer(self)
+
+    def render(self, name, labelnames, labelvalues):
+        with self._lock:
+            counts = list(self.counts)
+            total = self.sum
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float('inf'),), counts):
+            cumulative += count
+            le = _format_labels(labelnames, labelvalues, [('le', _format_value(float(bound)))])
+            lines.append(f'{name}_bucket{le} {cumulative}')
+        labels = _format_labels(labelnames, labelvalues)
+        lines.append(f'{name}_sum{labels} {_format_value(total)}')
+        lines.append(f'{name}_count{labels} {cumulative}')
+        return lines
+
+
+class _Timer:
+    __slots__ = ('child', 'start')
+
+    def __init__(self, child):
+        self.child = child
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.child.observe(time.perf_counter() - self.start)
+        return False
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS, registry=None):
+        self.buckets = tuple(sorted(float(b) for b in buckets))
+        super().__init__(name, documentation, labelnames, registry)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value):
+        self.labels().observe(value)
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics = []
+        self._collectors = []
+        self.collector_errors = Counter('heart_metrics_collector_errors_total',
+                                        'Scrape-time collectors that raised', ['collector'], registry=self)
+
+    def register(self, metric):
+        with self._lock:
+            self._metrics.append(metric)
+
+    def add_collector(self, collector):
+        # collector() runs at scrape time to refresh values owned by other objects
+        with self._lock:
+            self._collectors.append(collector)
+
+    def render(self):
+        for collector in list(self._collectors):
+            try:
+                collector()
+            except Exception:
+                # The scrape still succeeds; the collector's values are just stale
+                name = getattr(collector, '__qualname__', repr(collector))
+                logging.exception(f'Metrics collector {name} failed')
+                self.collector_errors.labels(name).inc()
+        lines = []
+        for metric in list(self._metrics):
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+## Serving metrics shared by app.py, asgi_app.py and the prediction pipeline
+REQUESTS = Counter('heart_requests_total', 'HTTP requests handled', ['route'])
+ERRORS = Counter('heart_request_errors_total', 'Requests that ended in an error response', ['route'])
+STAGE_SECONDS = Histogram('heart_stage_duration_seconds', 'Time spent in each prediction stage', ['stage'])
+BATCH_SIZE = Histogram('heart_batch_size', 'Rows per model call', ['source'], buckets=BATCH_SIZE_BUCKETS)
+CACHE_EVENTS = Counter('heart_result_cache_events_total', 'Prediction result cache lookups', ['result'])
+MODEL_INFO = Gauge('heart_model_info', 'Artifact version being served (1) or previously served (0)', ['version'])
+ARTIFACT_LOAD_SECONDS = Gauge('heart_artifact_load_seconds', 'Seconds spent loading the current artifacts')
+ARTIFACT_LOADED_AT = Gauge('heart_artifact_loaded_timestamp_seconds', 'Unix time the current artifacts were loaded')
+
+
+def register_serving_collectors(predict_pipeline):
+    def collect():
+        artifacts = predict_pipeline.artifact_cache.current
+        if artifacts is not None:
+            # Only the live version reports 1 so old versions drop out of queries
+            for labelvalues, child in list(MODEL_INFO._children.items()):
+                child.set(1 if labelvalues == (artifacts.version,) else 0)
+            MODEL_INFO.labels(artifacts.version).set(1)
+            ARTIFACT_LOAD_SECONDS.set(artifacts.load_seconds)
+            ARTIFACT_LOADED_AT.set(artifacts.loaded_at)
+        cache = predict_pipeline.result_cache
+        if cache is not None:
+            CACHE_EVENTS.labels('hit').set(cache.hits)
+            CACHE_EVENTS.labels('miss').set(cache.misses)
+            CACHE_EVENTS.labels('eviction').set(cache.evictions)
+
+    REGISTRY.add_collector(collect)
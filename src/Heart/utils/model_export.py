@@ -0,0 +1,447 @@
+import os
+import sys
+import json
+import hashlib
+import numpy as np
+from src.Heart.logger import logging
+from src.Heart.exception import customexception
+
+# Pickle-free model artifacts: every fitted parameter is written as a plain
+# .npy file next to a small header.json, and serving memory-maps the arrays
+# (np.load(mmap_mode='r')), so startup is near-instant, pages are shared
+# between processes and loading never executes code from the artifact.
+
+FORMAT_NAME = 'heart-model-arrays'
+FORMAT_VERSION = 1
+HEADER_FILE = 'header.json'
+
+
+class UnsupportedModelError(ValueError):
+    pass
+
+
+## Export
+
+def _linear_arrays(model):
+    return 'linear', {'classes': model.classes_, 'coef': model.coef_, 'intercept': model.intercept_}, {}
+
+
+def _gaussian_nb_arrays(model):
+    return 'gaussian_nb', {
+        'classes': model.classes_,
+        'theta': model.theta_,
+        'var': model.var_,
+        'class_prior': model.class_prior_,
+    }, {}
+
+
+def _flatten_sklearn_trees(estimators):
+    features, thresholds, lefts, rights, values, missing_left, roots = [], [], [], [], [], [], []
+    offset = 0
+    for estimator in estimators:
+        tree = estimator.tree_
+        left = tree.children_left.astype(np.int32)
+        right = tree.children_right.astype(np.int32)
+        is_leaf = left == -1
+        roots.append(offset)
+        lefts.append(np.where(is_leaf, -1, left + offset))
+        rights.append(np.where(is_leaf, -1, right + offset))
+        features.append(np.where(is_leaf, 0, tree.feature).astype(np.int32))
+        thresholds.append(tree.threshold.astype(np.float64))
+        # Leaf class distributions normalized the way predict_proba does
+        value = tree.value[:, 0, :].astype(np.float64)
+        totals = value.sum(axis=1, keepdims=True)
+        totals[totals == 0.0] = 1.0
+        values.append(value / totals)
+        missing = getattr(tree, 'missing_go_to_left', None)
+        missing_left.append(np.zeros(len(left), dtype=bool) if missing is None else missing.astype(bool))
+        offset += len(left)
+    return {
+        'roots': np.asarray(roots, dtype=np.int32),
+        'feature': np.concatenate(features),
+        'threshold': np.concatenate(thresholds),
+        'left': np.concatenate(lefts),
+        'right': np.concatenate(rights),
+        'value': np.concatenate(values),
+        'missing_left': np.concatenate(missing_left),
+    }
+
+
+def _tree_arrays(model):
+    estimators = getattr(model, 'estimators_', None) or [model]
+    arrays = _flatten_sklearn_trees(estimators)
+    arrays['classes'] = model.classes_
+    return 'sklearn_trees', arrays, {}
+
+
+def _knn_arrays(model):
+    metric = model.effective_metric_
+    if metric != 'euclidean' and not (metric == 'minkowski' and model.effective_metric_params_.get('p', 2) == 2):
+        raise UnsupportedModelError(f'KNN metric {metric!r} is not supported')
+    if model.weights not in ('uniform', 'distance'):
+        raise UnsupportedModelError('KNN with callable weights is not supported')
+    return 'knn', {
+        'classes': model.classes_,
+        'fit_X': np.asarray(model._fit_X, dtype=np.float64),
+        'fit_y': np.asarray(model._y, dtype=np.int64),
+    }, {'n_neighbors': int(model.n_neighbors), 'weights': model.weights}
+
+
+def _svc_arrays(model):
+    if len(model.classes_) != 2:
+        raise UnsupportedModelError('only binary SVC models are supported')
+    if model.kernel not in ('linear', 'rbf', 'poly', 'sigmoid'):
+        raise UnsupportedModelError(f'SVC kernel {model.kernel!r} is not supported')
+    arrays = {
+        'classes': model.classes_,
+        'support_vectors': model.support_vectors_,
+        'dual_coef': model.dual_coef_[0],
+        'intercept': model.intercept_,
+    }
+    if len(model.probA_):
+        # Platt scaling fitted by libsvm (probability=True), needed for predict_proba
+        arrays.update(prob_a=model.probA_, prob_b=model.probB_)
+    return 'svc', arrays, {'kernel': model.kernel, 'gamma': float(model._gamma), 'coef0': float(model.coef0), 'degree': int(model.degree)}
+
+
+def _xgboost_arrays(model):
+    booster = model.get_booster()
+    config = json.loads(bytes(booster.save_raw(raw_format='json')))['learner']
+    gradient_booster = config['gradient_booster']
+    if gradient_booster['name'] == 'dart':
+        tree_model = gradient_booster['gbtree']['model']
+        weights = np.asarray(gradient_booster['weight_drop'], dtype=np.float64)
+    elif gradient_booster['name'] == 'gbtree':
+        tree_model = gradient_booster['model']
+        weights = np.ones(len(tree_model['trees']), dtype=np.float64)
+    else:
+        raise UnsupportedModelError(f"XGBoost booster {gradient_booster['name']!r} is not supported")
+
+    objective = config['objective']['name']
+    if objective not in ('binary:logistic', 'multi:softprob', 'multi:softmax'):
+        raise UnsupportedModelError(f'XGBoost objective {objective!r} is not supported')
+
+    features, thresholds, lefts, rights, values, default_left, roots = [], [], [], [], [], [], []
+    offset = 0
+    for tree in tree_model['trees']:
+        left = np.asarray(tree['left_children'], dtype=np.int32)
+        right = np.asarray(tree['right_children'], dtype=np.int32)
+        is_leaf = left == -1
+        roots.append(offset)
+        lefts.append(np.where(is_leaf, -1, left + offset))
+        rights.append(np.where(is_leaf, -1, right + offset))
+        features.append(np.asarray(tree['split_indices'], dtype=np.int32))
+        # Leaf weights are stored in split_conditions for leaf nodes
+        conditions = np.asarray(tree['split_conditions'], dtype=np.float32)
+        thresholds.append(conditions)
+        values.append(np.where(is_leaf, conditions, 0.0).astype(np.float64))
+        default_left.append(np.asarray(tree['default_left'], dtype=bool))
+        offset += len(left)
+
+    base_score = float(str(config['learner_model_param']['base_score']).strip('[]').split(',')[0])
+    n_groups = max(1, int(config['learner_model_param'].get('num_class', 0) or 0))
+    return 'xgboost', {
+        'classes': np.asarray(getattr(model, 'classes_', np.arange(max(2, n_groups)))),
+        'roots': np.asarray(roots, dtype=np.int32),
+        'feature': np.concatenate(features),
+        'threshold': np.concatenate(thresholds),
+        'left': np.concatenate(lefts),
+        'right': np.concatenate(rights),
+        'value': np.concatenate(values),
+        'missing_left': np.concatenate(default_left),
+        'tree_weight': weights,
+        'tree_group': np.asarray(tree_model['tree_info'], dtype=np.int32),
+    }, {'objective': objective, 'base_score': base_score, 'n_groups': n_groups}
+
+
+EXPORTERS = {
+    'LogisticRegression': _linear_arrays,
+    # Only meaningful for loss='log_loss', whose probabilities are the same sigmoid
+    'SGDClassifier': _linear_arrays,
+    'GaussianNB': _gaussian_nb_arrays,
+    'DecisionTreeClassifier': _tree_arrays,
+    'RandomForestClassifier': _tree_arrays,
+    'KNeighborsClassifier': _knn_arrays,
+    'SVC': _svc_arrays,
+    'XGBClassifier': _xgboost_arrays,
+}
+
+
+def is_exportable(model):
+    return type(model).__name__ in EXPORTERS
+
+
+def export_model(model, dir_path):
+    try:
+        exporter = EXPORTERS.get(type(model).__name__)
+        if exporter is None:
+            raise UnsupportedModelError(f'{type(model).__name__} cannot be exported without pickle')
+        model_type, arrays, params = exporter(model)
+
+        os.makedirs(dir_path, exist_ok=True)
+        entries = {}
+        content = hashlib.sha256()
+        for name, array in sorted(arrays.items()):
+            array = np.ascontiguousarray(array)
+            if array.dtype.kind not in 'biuf':
+                raise UnsupportedModelError(f'array {name!r} has non-numeric dtype {array.dtype}')
+            digest = hashlib.sha256(array.tobytes()).hexdigest()
+            content.update(name.encode())
+            content.update(digest.encode())
+            # Content-addressed file names: a re-export never overwrites a file
+            # another process may still have memory-mapped.
+            file_name = f'{name}-{digest[:12]}.npy'
+            file_path = os.path.join(dir_path, file_name)
+            if not os.path.exists(file_path):
+                tmp_path = file_path + '.tmp'
+                with open(tmp_path, 'wb') as file_obj:
+                    np.save(file_obj, array, allow_pickle=False)
+                os.replace(tmp_path, file_path)
+            entries[name] = {'file': file_name, 'dtype': array.dtype.str, 'shape': list(array.shape), 'sha256': digest}
+
+        header = {
+            'format': FORMAT_NAME,
+            'format_version': FORMAT_VERSION,
+            'model_type': model_type,
+            'estimator': f'{type(model).__module__}.{type(model).__name__}',
+            'params': params,
+            'arrays': entries,
+            'content_sha256': content.hexdigest(),
+        }
+        # The header is replaced last and atomically: readers either see the
+        # old complete model or the new complete model.
+        tmp_header = os.path.join(dir_path, HEADER_FILE + '.tmp')
+        with open(tmp_header, 'w') as file_obj:
+            json.dump(header, file_obj, indent=2)
+        os.replace(tmp_header, os.path.join(dir_path, HEADER_FILE))
+
+        referenced = {entry['file'] for entry in entries.values()}
+        for file_name in os.listdir(dir_path):
+            if file_name.endswith('.npy') and file_name not in referenced:
+                try:
+                    os.remove(os.path.join(dir_path, file_name))
+                except OSError:
+                    pass
+        logging.info(f'Exported {type(model).__name__} to {dir_path}')
+        return header
+
+    except Exception as e:
+        logging.info('Exception occured while exporting the model')
+        raise customexception(e,sys)
+
+
+## Inference
+
+def _sigmoid(z):
+    return 1.0 / (1.0 + np.exp(-z))
+
+
+def _softmax(z):
+    z = z - z.max(axis=1, keepdims=True)
+    np.exp(z, out=z)
+    z /= z.sum(axis=1, keepdims=True)
+    return z
+
+
+def _binary_proba(p):
+    return np.column_stack([1.0 - p, p])
+
+
+def _apply_trees(X, roots, feature, threshold, left, right, missing_left, strict):
+    # Walks every row down every tree at once, one depth level per iteration
+    nodes = np.repeat(roots[np.newaxis, :], X.shape[0], axis=0)
+    rows = np.arange(X.shape[0])[:, np.newaxis]
+    while True:
+        child_left = left[nodes]
+        active = child_left != -1
+        if not active.any():
+            return nodes
+        x = X[rows, feature[nodes]]
+        go_left = x < threshold[nodes] if strict else x <= threshold[nodes]
+        go_left = np.where(np.isnan(x), missing_left[nodes], go_left)
+        nodes = np.where(active, np.where(go_left, child_left, right[nodes]), nodes)
+
+
+class ExportedModel:
+    def __init__(self, header, arrays):
+        self.header = header
+        self.params = header['params']
+        self.arrays = arrays
+        self.classes_ = arrays['classes']
+
+    def predict(self, X):
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+
+class LinearModel(ExportedModel):
+    def decision_function(self, X):
+        scores = np.asarray(X, dtype=np.float64) @ self.arrays['coef'].T + self.arrays['intercept']
+        return scores.ravel() if scores.shape[1] == 1 else scores
+
+    def predict(self, X):
+        scores = self.decision_function(X)
+        if scores.ndim == 1:
+            return self.classes_[(scores > 0).astype(np.intp)]
+        return self.classes_[np.argmax(scores, axis=1)]
+
+    def predict_proba(self, X):
+        scores = self.decision_function(X)
+        if scores.ndim == 1:
+            return _binary_proba(_sigmoid(scores))
+        return _softmax(scores)
+
+
+class GaussianNBModel(ExportedModel):
+    def predict_proba(self, X):
+        X = np.asarray(X, dtype=np.float64)
+        theta, var = self.arrays['theta'], self.arrays['var']
+        jll = np.log(self.arrays['class_prior']) - 0.5 * np.sum(np.log(2.0 * np.pi * var), axis=1)
+        jll = jll - 0.5 * (((X[:, np.newaxis, :] - theta) ** 2) / var).sum(axis=2)
+        return _softmax(jll)
+
+
+class SklearnTreesModel(ExportedModel):
+    def predict_proba(self, X):
+        # sklearn trees compare float32 features against float64 thresholds
+        X = np.asarray(X, dtype=np.float32)
+        a = self.arrays
+        leaves = _apply_trees(X, a['roots'], a['feature'], a['threshold'], a['left'], a['right'], a['missing_left'], strict=False)
+        return a['value'][leaves].mean(axis=1)
+
+
+class KNNModel(ExportedModel):
+    def predict_proba(self, X):
+        X = np.asarray(X, dtype=np.float64)
+        fit_X, fit_y = self.arrays['fit_X'], self.arrays['fit_y']
+        k = self.params['n_neighbors']
+        distances = (X ** 2).sum(axis=1)[:, np.newaxis] - 2.0 * X @ fit_X.T + (fit_X ** 2).sum(axis=1)
+        np.maximum(distances, 0.0, out=distances)
+        neighbors = np.argpartition(distances, k - 1, axis=1)[:, :k]
+        labels = fit_y[neighbors]
+        if self.params['weights'] == 'distance':
+            d = np.sqrt(np.take_along_axis(distances, neighbors, axis=1))
+            with np.errstate(divide='ignore'):
+                weights = 1.0 / d
+            exact = np.isinf(weights)
+            weights = np.where(exact.any(axis=1, keepdims=True), exact.astype(np.float64), weights)
+        else:
+            weights = np.ones(labels.shape)
+        proba = np.zeros((X.shape[0], len(self.classes_)))
+        for c in range(len(self.classes_)):
+            proba[:, c] = np.where(labels == c, weights, 0.0).sum(axis=1)
+        proba /= proba.sum(axis=1, keepdims=True)
+        return proba
+
+
+class SVCModel(ExportedModel):
+    def decision_function(self, X):
+        X = np.asarray(X, dtype=np.float64)
+        sv = self.arrays['support_vectors']
+        kernel, gamma, coef0, degree = (self.params[k] for k in ('kernel', 'gamma', 'coef0', 'degree'))
+        if kernel == 'linear':
+            K = X @ sv.T
+        elif kernel == 'rbf':
+            K = (X ** 2).sum(axis=1)[:, np.newaxis] - 2.0 * X @ sv.T + (sv ** 2).sum(axis=1)
+            K = np.exp(-gamma * np.maximum(K, 0.0))
+        elif kernel == 'poly':
+            K = (gamma * (X @ sv.T) + coef0) ** degree
+        else:
+            K = np.tanh(gamma * (X @ sv.T) + coef0)
+        return K @ self.arrays['dual_coef'] + self.arrays['intercept'][0]
+
+    def predict(self, X):
+        return self.classes_[(self.decision_function(X) > 0).astype(np.intp)]
+
+    @property
+    def predict_proba(self):
+        # Like sklearn's SVC, only there when it was fitted with probability=True
+        if 'prob_a' not in self.arrays:
+            raise AttributeError('predict_proba is only available for SVC fitted with probability=True')
+        return self._platt_proba
+
+    def _platt_proba(self, X):
+        # libsvm's sigmoid on its own decision values, which have the opposite
+        # sign of sklearn's in the binary case, clipped like libsvm does
+        r = _sigmoid(self.arrays['prob_a'][0] * self.decision_function(X) - self.arrays['prob_b'][0])
+        r = np.clip(r, 1e-7, 1 - 1e-7)
+        return _pairwise_coupling(r, 1.0 - r)
+
+
+def _pairwise_coupling(r01, r10):
+    # libsvm's multiclass_probability for two classes, run row-wise: it stops
+    # at a tolerance rather than returning [r01, r10] exactly, and sklearn's
+    # predict_proba reports where it stopped
+    Q = [[r10 * r10, -r10 * r01], [-r10 * r01, r01 * r01]]
+    p = [np.full(len(r01), 0.5), np.full(len(r01), 0.5)]
+    active = np.ones(len(r01), dtype=bool)
+    for _ in range(100):
+        Qp = [Q[t][0] * p[0] + Q[t][1] * p[1] for t in range(2)]
+        pQp = p[0] * Qp[0] + p[1] * Qp[1]
+        active &= np.maximum(np.abs(Qp[0] - pQp), np.abs(Qp[1] - pQp)) >= 0.005 / 2
+        if not active.any():
+            break
+        for t in range(2):
+            diff = np.where(active, (pQp - Qp[t]) / Q[t][t], 0.0)
+            p[t] = p[t] + diff
+            pQp = (pQp + diff * (diff * Q[t][t] + 2 * Qp[t])) / (1 + diff) / (1 + diff)
+            Qp = [(Qp[j] + diff * Q[t][j]) / (1 + diff) for j in range(2)]
+            p = [p[j] / (1 + diff) for j in range(2)]
+    return np.column_stack(p)
+
+
+class XGBoostModel(ExportedModel):
+    def predict_margin(self, X):
+        # XGBoost splits on float32 features with a strict "<" test
+        X = np.asarray(X, dtype=np.float32)
+        a = self.arrays
+        leaves = _apply_trees(X, a['roots'], a['feature'], a['threshold'], a['left'], a['right'], a['missing_left'], strict=True)
+        contributions = a['value'][leaves] * a['tree_weight']
+        n_groups = self.params['n_groups']
+        base_score = self.params['base_score']
+        if self.params['objective'] == 'binary:logistic':
+            return contributions.sum(axis=1) + np.log(base_score / (1.0 - base_score))
+        margin = np.full((X.shape[0], n_groups), base_score)
+        for group in range(n_groups):
+            margin[:, group] += contributions[:, a['tree_group'] == group].sum(axis=1)
+        return margin
+
+    def predict_proba(self, X):
+        margin = self.predict_margin(X)
+        if margin.ndim == 1:
+            return _binary_proba(_sigmoid(margin))
+        return _softmax(margin)
+
+
+MODEL_TYPES = {
+    'linear': LinearModel,
+    'gaussian_nb': GaussianNBModel,
+    'sklearn_trees': SklearnTreesModel,
+    'knn': KNNModel,
+    'svc': SVCModel,
+    'xgboost': XGBoostModel,
+}
+
+
+def load_exported_model(dir_path, mmap=True, header_bytes=None):
+    try:
+        if header_bytes is None:
+            with open(os.path.join(dir_path, HEADER_FILE), 'rb') as file_obj:
+                header_bytes = file_obj.read()
+        header = json.loads(header_bytes)
+        if header.get('format') != FORMAT_NAME or header.get('format_version') != FORMAT_VERSION:
+            raise ValueError(f"{dir_path} is not a {FORMAT_NAME} v{FORMAT_VERSION} artifact")
+        model_class = MODEL_TYPES.get(header['model_type'])
+        if model_class is None:
+            raise ValueError(f"unknown model type {header['model_type']!r}")
+
+        arrays = {}
+        for name, entry in header['arrays'].items():
+            array = np.load(os.path.join(dir_path, entry['file']), mmap_mode='r' if mmap else None, allow_pickle=False)
+            if array.dtype.str != entry['dtype'] or list(array.shape) != entry['shape']:
+                raise ValueError(f'array {name!r} does not match the header')
+            arrays[name] = array
+        return model_class(header, arrays)
+
+    except Exception as e:
+        logging.info('Exception Occured in load_exported_model')
+        raise customexception(e,sys)
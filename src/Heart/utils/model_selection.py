@@ -0,0 +1,106 @@
+import os
+import sys
+import json
+import time
+from dataclasses import dataclass
+from src.Heart.logger import logging
+from src.Heart.exception import customexception
+
+
+@dataclass
+class ModelSelectionConfig:
+    model_selection_file_path = os.path.join('Artifacts','Model_selection.json')
+    # accuracy: best test accuracy (the original rule)
+    # latency_budget: best accuracy among models within the latency/size budgets
+    # pareto: fastest model on the accuracy/latency/size Pareto front whose
+    #         accuracy is within accuracy_tolerance of the best
+    policy = os.environ.get('HEART_SELECTION_POLICY', 'accuracy')
+    latency_budget_ms = float(os.environ['HEART_LATENCY_BUDGET_MS']) if os.environ.get('HEART_LATENCY_BUDGET_MS') else None
+    size_budget_bytes = int(os.environ['HEART_SIZE_BUDGET_BYTES']) if os.environ.get('HEART_SIZE_BUDGET_BYTES') else None
+    accuracy_tolerance = float(os.environ.get('HEART_ACCURACY_TOLERANCE', 0.01))
+
+
+def _dominates(a, b):
+    # a is at least as good as b on every axis and strictly better on one
+    better_or_equal = (a['accuracy'] >= b['accuracy'] and a['latency_p99_ms'] <= b['latency_p99_ms']
+                       and a['model_size_bytes'] <= b['model_size_bytes'])
+    strictly_better = (a['accuracy'] > b['accuracy'] or a['latency_p99_ms'] < b['latency_p99_ms']
+                       or a['model_size_bytes'] < b['model_size_bytes'])
+    return better_or_equal and strictly_better
+
+
+def pareto_front(report):
+    candidates = {name: result for name, result in report.items() if result['status'] == 'ok'}
+    return [
+        name for name, result in candidates.items()
+        if not any(_dominates(other, result) for other_name, other in candidates.items() if other_name != name)
+    ]
+
+
+def _best_accuracy(names, report):
+    # First model in report order wins ties, as ModelTrainer always did
+    return max(names, key=lambda name: (report[name]['accuracy'], -list(report).index(name)))
+
+
+def select_model(report, policy=None, latency_budget_ms=None, size_budget_bytes=None, accuracy_tolerance=None):
+    try:
+        config = ModelSelectionConfig()
+        policy = policy or config.policy
+        latency_budget_ms = config.latency_budget_ms if latency_budget_ms is None else latency_budget_ms
+        size_budget_bytes = config.size_budget_bytes if size_budget_bytes is None else size_budget_bytes
+        accuracy_tolerance = config.accuracy_tolerance if accuracy_tolerance is None else accuracy_tolerance
+
+        candidates = [name for name, result in report.items() if result['status'] == 'ok']
+        if not candidates:
+            raise ValueError('Every candidate model failed to train')
+        front = pareto_front(report) if policy != 'accuracy' else []
+        reason = ''
+
+        if policy == 'accuracy':
+            selected = _best_accuracy(candidates, report)
+            reason = 'highest test accuracy'
+        elif policy == 'latency_budget':
+            eligible = [
+                name for name in candidates
+                if (latency_budget_ms is None or report[name]['latency_p99_ms'] <= latency_budget_ms)
+                and (size_budget_bytes is None or report[name]['model_size_bytes'] <= size_budget_bytes)
+            ]
+            if eligible:
+                selected = _best_accuracy(eligible, report)
+                reason = 'highest test accuracy within the budgets'
+            else:
+                # Nothing fits: serve the fastest model rather than fail the training run
+                selected = min(candidates, key=lambda name: report[name]['latency_p99_ms'])
+                reason = 'no model met the budgets, fell back to the lowest p99 latency'
+                logging.info(f'No model met the latency/size budgets, selecting the fastest: {selected}')
+        elif policy == 'pareto':
+            best = max(report[name]['accuracy'] for name in front)
+            near_best = [name for name in front if report[name]['accuracy'] >= best - accuracy_tolerance]
+            selected = min(near_best, key=lambda name: (report[name]['latency_p99_ms'], report[name]['model_size_bytes']))
+            reason = f'lowest p99 latency on the Pareto front within {accuracy_tolerance} of the best accuracy'
+        else:
+            raise ValueError(f'Unknown selection policy {policy!r}')
+
+        selection = {
+            'selected_model': selected,
+            'policy': policy,
+            'reason': reason,
+            'latency_budget_ms': latency_budget_ms,
+            'size_budget_bytes': size_budget_bytes,
+            'accuracy_tolerance': accuracy_tolerance,
+            'pareto_front': front,
+            'candidates': report,
+            'selected_at': time.time(),
+        }
+        return selected, selection
+
+    except Exception as e:
+        logging.info('Exception occured during model selection')
+        raise customexception(e,sys)
+
+
+def save_selection(selection, file_path=None):
+    file_path = file_path or ModelSelectionConfig.model_selection_file_path
+    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+    with open(file_path, 'w') as file_obj:
+        json.dump(selection, file_obj, indent=2, default=float)
@@ -0,0 +1,92 @@
+import os
+import time
+import hashlib
+import threading
+import numpy as np
+from collections import OrderedDict
+from dataclasses import dataclass
+
+
+@dataclass
+class ResultCacheConfig:
+    max_entries = int(os.environ.get('HEART_RESULT_CACHE_SIZE', 10000))
+    ttl_seconds = float(os.environ.get('HEART_RESULT_CACHE_TTL', 300))
+
+
+class ResultCache:
+    def __init__(self, max_entries=None, ttl_seconds=None):
+        config = ResultCacheConfig()
+        self.max_entries = config.max_entries if max_entries is None else max_entries
+        self.ttl_seconds = config.ttl_seconds if ttl_seconds is None else ttl_seconds
+
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._version = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def make_key(row, version):
+        # Canonical float64 bytes: +0.0 folds -0.0 and every NaN becomes the same NaN
+        row = np.ascontiguousarray(row, dtype=np.float64) + 0.0
+        row[np.isnan(row)] = np.nan
+        digest = hashlib.blake2b(row.tobytes(), digest_size=16)
+        digest.update(version.encode())
+        return digest.digest()
+
+    def _check_version(self, version):
+        # Entries of a previous artifact version can never hit again, drop them eagerly
+        if version != self._version:
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+            self._version = version
+
+    def get_many(self, keys, version, record_misses=True):
+        now = time.monotonic()
+        values = []
+        with self._lock:
+            self._check_version(version)
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is not None and entry[1] > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    values.append(entry[0])
+                else:
+                    if entry is not None:
+                        del self._entries[key]
+                    if record_misses:
+                        self.misses += 1
+                    values.append(None)
+        return values
+
+    def put_many(self, keys, values, version):
+        expires = time.monotonic() + self.ttl_seconds
+        with self._lock:
+            self._check_version(version)
+            for key, value in zip(keys, values):
+                self._entries[key] = (value, expires)
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl_seconds,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+                'model_version': self._version,
+            }
@@ -0,0 +1,105 @@
+import math
+import numpy as np
+
+## Column order the preprocessor is fitted on; every serving path builds rows in this order
+FEATURE_COLUMNS = ['age', 'sex', 'cp', 'trestbps', 'chol', 'fbs', 'restecg', 'thalach', 'exang', 'oldpeak', 'slope', 'ca', 'thal']
+
+TARGET_COLUMN = 'target'
+
+## Storage dtype and valid (inclusive) range of every column. Flags and small
+## categoricals take one byte instead of eight. Integer columns store a missing
+## value as MISSING_CODES[dtype], which lies outside every valid range; code
+## past storage (to_float) only ever sees NaN.
+FEATURE_SCHEMA = {
+    'age': ('uint8', 1, 120),
+    'sex': ('uint8', 0, 1),
+    'cp': ('uint8', 0, 4),
+    'trestbps': ('uint16', 0, 300),
+    'chol': ('uint16', 0, 1000),
+    'fbs': ('uint8', 0, 1),
+    'restecg': ('uint8', 0, 2),
+    'thalach': ('uint8', 0, 250),
+    'exang': ('uint8', 0, 1),
+    'oldpeak': ('float32', -10.0, 10.0),
+    'slope': ('uint8', 0, 3),
+    'ca': ('uint8', 0, 4),
+    'thal': ('uint8', 0, 7),
+}
+TARGET_SCHEMA = ('uint8', 0, 1)
+
+MISSING_CODES = {'uint8': 255, 'uint16': 65535}
+
+# Training arrays are float32: half the memory of float64, and trees, KNN and
+# XGBoost use float32 natively
+TRAINING_DTYPE = np.float32
+
+
+def storage_dtypes():
+    dtypes = {column: np.dtype(FEATURE_SCHEMA[column][0]) for column in FEATURE_COLUMNS}
+    dtypes[TARGET_COLUMN] = np.dtype(TARGET_SCHEMA[0])
+    return dtypes
+
+
+def _check_values(column, values, dtype, low, high):
+    # values: float array with NaN for missing; raises on the first bad column
+    present = values[~np.isnan(values)]
+    out_of_range = (present < low) | (present > high)
+    if np.dtype(dtype).kind in 'iu':
+        out_of_range |= present != np.round(present)
+    if out_of_range.any():
+        bad = present[out_of_range]
+        kind = 'whole numbers in' if np.dtype(dtype).kind in 'iu' else 'in'
+        raise ValueError(f'{column}: {len(bad)} value(s) are not {kind} [{low}, {high}], e.g. {bad[0]:g}')
+
+
+def to_storage(frame):
+    # Validates a source chunk against the schema and returns it in the compact dtypes
+    import pandas as pd
+
+    columns = {}
+    for column in FEATURE_COLUMNS + [TARGET_COLUMN]:
+        dtype, low, high = FEATURE_SCHEMA[column] if column != TARGET_COLUMN else TARGET_SCHEMA
+        values = pd.to_numeric(frame[column]).to_numpy(dtype=np.float64)
+        _check_values(column, values, dtype, low, high)
+        missing = np.isnan(values)
+        if missing.any():
+            if column == TARGET_COLUMN:
+                raise ValueError(f'{missing.sum()} row(s) without a {TARGET_COLUMN!r} value')
+            if dtype in MISSING_CODES:
+                values[missing] = MISSING_CODES[dtype]
+        columns[column] = values.astype(dtype)
+    return pd.DataFrame(columns, index=frame.index)
+
+
+def to_float(columns, dtype=TRAINING_DTYPE, out=None):
+    # (n, 13) C-contiguous float matrix from stored columns (a DataFrame or a
+    # {column: array} mapping), with missing codes turned back into NaN
+    n_rows = len(columns[FEATURE_COLUMNS[0]])
+    X = np.empty((n_rows, len(FEATURE_COLUMNS)), dtype=dtype) if out is None else out
+    for j, column in enumerate(FEATURE_COLUMNS):
+        values = np.asarray(columns[column])
+        X[:, j] = values
+        code = MISSING_CODES.get(values.dtype.name)
+        if code is not None:
+            X[values == code, j] = np.nan
+    return X
+
+
+def check_feature_value(column, number):
+    # Single parsed value from an API request; NaN (missing) is always allowed
+    dtype, low, high = FEATURE_SCHEMA[column]
+    if math.isnan(number):
+        return number
+    if not low <= number <= high:
+        raise ValueError(f'{column}: {number:g} is outside the valid range [{low}, {high}]')
+    if np.dtype(dtype).kind in 'iu' and not number.is_integer():
+        raise ValueError(f'{column}: expected a whole number, got {number:g}')
+    return number
+
+
+def validate_feature_matrix(X):
+    # (n, 13) float matrix in FEATURE_COLUMNS order, NaN for missing
+    for j, column in enumerate(FEATURE_COLUMNS):
+        dtype, low, high = FEATURE_SCHEMA[column]
+        _check_values(column, X[:, j], dtype, low, high)
+    return X
@@ -0,0 +1,178 @@
+import os
+import sys
+import json
+import shutil
+import hashlib
+import numpy as np
+from src.Heart.logger import logging
+from src.Heart.exception import customexception
+
+# Columnar storage for the raw/train/test splits: one directory per split with
+# a schema.json (column names, dtypes, row counts) and one .npy file per column
+# per part. Readers memory-map only the columns they ask for, so nothing is
+# re-parsed and untouched columns are never read from disk. Parts are the
+# chunks a streaming writer appended, and streaming readers get them back one
+# at a time.
+#
+#   Artifacts/train_data/schema.json
+#   Artifacts/train_data/part-00000/age.npy
+#   Artifacts/train_data/part-00000/sex.npy ...
+
+FORMAT_NAME = 'heart-split'
+FORMAT_VERSION = 1
+SCHEMA_FILE = 'schema.json'
+
+
+class SplitWriter:
+    # Writes a split part by part; nothing is visible at path until close()
+    def __init__(self, path, dtypes=None):
+        self.path = path
+        self.tmp_path = f'{path}.{os.getpid()}.tmp'
+        # Column dtypes are fixed by the first part unless given up front
+        self.dtypes = dict(dtypes) if dtypes else None
+        self.columns = None
+        self.parts = []
+        shutil.rmtree(self.tmp_path, ignore_errors=True)
+        os.makedirs(self.tmp_path)
+
+    def write(self, frame):
+        if self.columns is None:
+            self.columns = list(frame.columns)
+            if self.dtypes is None:
+                self.dtypes = {column: frame[column].dtype for column in self.columns}
+            for column in self.columns:
+                if np.dtype(self.dtypes[column]).kind not in 'biuf':
+                    raise ValueError(f'column {column!r} has non-numeric dtype {self.dtypes[column]}')
+        elif list(frame.columns) != self.columns:
+            raise ValueError(f'part columns {list(frame.columns)} do not match {self.columns}')
+
+        part_name = f'part-{len(self.parts):05d}'
+        os.makedirs(os.path.join(self.tmp_path, part_name))
+        for column in self.columns:
+            values = frame[column].to_numpy()
+            dtype = np.dtype(self.dtypes[column])
+            if dtype.kind in 'iub' and values.dtype.kind == 'f' and np.isnan(values).any():
+                raise ValueError(f'column {column!r} has missing values but is stored as {dtype}')
+            np.save(os.path.join(self.tmp_path, part_name, f'{column}.npy'),
+                    np.ascontiguousarray(values.astype(dtype, copy=False)), allow_pickle=False)
+        self.parts.append({'name': part_name, 'rows': len(frame)})
+
+    def close(self):
+        if self.columns is None:
+            raise ValueError(f'no data was written to {self.path}')
+        schema = {
+            'format': FORMAT_NAME,
+            'format_version': FORMAT_VERSION,
+            'columns': [{'name': column, 'dtype': np.dtype(self.dtypes[column]).str} for column in self.columns],
+            'parts': self.parts,
+            'rows': sum(part['rows'] for part in self.parts),
+        }
+        with open(os.path.join(self.tmp_path, SCHEMA_FILE), 'w') as file_obj:
+            json.dump(schema, file_obj, indent=2)
+        # Swap the finished directory into place; a reader mid-load keeps its
+        # memory maps of the old files, which stay valid after they are unlinked
+        shutil.rmtree(self.path, ignore_errors=True)
+        os.replace(self.tmp_path, self.path)
+        return schema
+
+    def abort(self):
+        shutil.rmtree(self.tmp_path, ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def write_split(frame, path, dtypes=None):
+    try:
+        with SplitWriter(path, dtypes) as writer:
+            writer.write(frame)
+        return path
+    except Exception as e:
+        logging.info('Exception occured while writing the split')
+        raise customexception(e,sys)
+
+
+def read_schema(path):
+    with open(os.path.join(path, SCHEMA_FILE)) as file_obj:
+        schema = json.load(file_obj)
+    if schema.get('format') != FORMAT_NAME or schema.get('format_version') != FORMAT_VERSION:
+        raise ValueError(f'{path} is not a {FORMAT_NAME} v{FORMAT_VERSION} split')
+    return schema
+
+
+def _load_part(path, schema, part, columns, mmap):
+    dtypes = {column['name']: column['dtype'] for column in schema['columns']}
+    arrays = {}
+    for column in columns:
+        if column not in dtypes:
+            raise KeyError(f'{path} has no column {column!r}')
+        array = np.load(os.path.join(path, part['name'], f'{column}.npy'), mmap_mode='r' if mmap else None, allow_pickle=False)
+        if array.dtype.str != dtypes[column] or array.shape != (part['rows'],):
+            raise ValueError(f"{part['name']}/{column}.npy does not match the schema")
+        arrays[column] = array
+    return arrays
+
+
+def load_columns(path, columns=None, mmap=True):
+    # {column: array}; with a single part (the in-memory pipeline) the arrays
+    # are read-only memory maps of the files, otherwise parts are concatenated
+    try:
+        schema = read_schema(path)
+        columns = columns or [column['name'] for column in schema['columns']]
+        parts = [_load_part(path, schema, part, columns, mmap) for part in schema['parts']]
+        if len(parts) == 1:
+            return parts[0]
+        return {column: np.concatenate([part[column] for part in parts]) for column in columns}
+    except Exception as e:
+        logging.info('Exception occured while loading the split')
+        raise customexception(e,sys)
+
+
+def read_split(path, columns=None):
+    import pandas as pd
+
+    return pd.DataFrame(load_columns(path, columns))
+
+
+def iter_split(path, columns=None):
+    # One DataFrame per stored part, for the streaming stages
+    import pandas as pd
+
+    try:
+        schema = read_schema(path)
+        columns = columns or [column['name'] for column in schema['columns']]
+        for part in schema['parts']:
+            yield pd.DataFrame(_load_part(path, schema, part, columns, mmap=True))
+    except Exception as e:
+        logging.info('Exception occured while reading the split')
+        raise customexception(e,sys)
+
+
+def split_digest(path):
+    # sha256 of every stored column of every part, read through memory maps;
+    # identifies the exact rows a model was trained on
+    try:
+        schema = read_schema(path)
+        columns = [column['name'] for column in schema['columns']]
+        digest = hashlib.sha256()
+        for part in schema['parts']:
+            for column, array in _load_part(path, schema, part, columns, mmap=True).items():
+                digest.update(f'{column}{array.dtype.str}{array.shape}'.encode())
+                digest.update(array.reshape(-1).view(np.uint8))
+        return digest.hexdigest()
+    except Exception as e:
+        logging.info('Exception occured while hashing the split')
+        raise customexception(e,sys)
+
+
+def export_csv(path, csv_path):
+    # Optional side output for people who want to open a split in a spreadsheet
+    for part_index, frame in enumerate(iter_split(path)):
+        frame.to_csv(csv_path, mode='w' if part_index == 0 else 'a', header=part_index == 0, index=False)
+    return csv_path
@@ -1,10 +1,10 @@
 import os
 import sys
+import time
 import pickle
-import numpy as np
-import pandas as pd
+import multiprocessing
+import multiprocessing.connection
 from src.Heart.logger import logging
-from sklearn.metrics import accuracy_score
 from src.Heart.exception import customexception
 
 def save_object(file_path, obj):
@@ -16,19 +16,233 @@ def save_object(file_path, obj):
     except Exception as e:
         raise customexception(e, sys)
     
-def evaluate_model(X_train, y_train, X_test, y_test, models):
+def _limit_threads(model, threads):
+    # Returns the original settings so the fitted model is saved without the
+    # training-time thread cap (e.g. RandomForest n_jobs at predict time).
+    params = model.get_params() if hasattr(model, 'get_params') else {}
+    # LogisticRegression ignores n_jobs (and warns about it) since sklearn 1.8
+    if 'n_jobs' in params and type(model).__name__ != 'LogisticRegression':
+        model.set_params(n_jobs=threads)
+        return {'n_jobs': params['n_jobs']}
+    if type(model).__name__.startswith('CatBoost'):
+        original = model.get_params().get('thread_count', -1)
+        model.set_params(thread_count=threads)
+        return {'thread_count': original}
+    return {}
+
+
+PROFILE_KEYS = ('latency_p50_ms', 'latency_p99_ms', 'batch_rows_per_second', 'model_size_bytes', 'peak_memory_bytes')
+
+
+def profile_inference(model, X, single_rows=200, batch_rows=1000, repeats=5):
+    import tracemalloc
+    import numpy as np
+
+    X = np.ascontiguousarray(X)
+    # Single-row latency the way the API calls the model: one (1, n_features) row at a time
+    latencies = []
+    for i in range(single_rows):
+        row = X[i % len(X)][np.newaxis, :]
+        start = time.perf_counter()
+        model.predict(row)
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+
+    batch = np.resize(X, (batch_rows, X.shape[1]))
+    batch_seconds = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        model.predict(batch)
+        batch_seconds.append(time.perf_counter() - start)
+
+    # Peak Python/numpy allocation while scoring one batch
+    tracemalloc.start()
+    try:
+        model.predict(batch)
+        _, peak_memory = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'latency_p50_ms': latencies[len(latencies) // 2] * 1000.0,
+        'latency_p99_ms': latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000.0,
+        'batch_rows_per_second': batch_rows / sorted(batch_seconds)[len(batch_seconds) // 2],
+        'model_size_bytes': len(pickle.dumps(model)),
+        'peak_memory_bytes': peak_memory,
+    }
+
+
+def fit_and_score(model, X_train, y_train, X_test, y_test, threads=None):
+    from threadpoolctl import threadpool_limits
+    from sklearn.metrics import accuracy_score
+
+    original = _limit_threads(model, threads) if threads else {}
+    # Caps the BLAS/OpenMP pools numpy, sklearn and xgboost use under the hood
+    with threadpool_limits(limits=threads):
+        start = time.perf_counter()
+        model.fit(X_train, y_train)
+        fit_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        y_test_pred = model.predict(X_test)
+        predict_seconds = time.perf_counter() - start
+
+    if original:
+        model.set_params(**original)
+
+    return {
+        'model': model,
+        'accuracy': accuracy_score(y_test, y_test_pred),
+        'fit_seconds': fit_seconds,
+        'predict_seconds': predict_seconds,
+    }
+
+
+def _evaluate_in_child(conn, model, X_train, y_train, X_test, y_test, threads):
+    try:
+        conn.send(('ok', fit_and_score(model, X_train, y_train, X_test, y_test, threads)))
+    except BaseException as e:
+        conn.send(('failed', f'{type(e).__name__}: {e}'))
+    finally:
+        conn.close()
+
+
+def _report_entry(status, result=None, error=None, cached=False):
+    result = result or {}
+    entry = {
+        'status': status,
+        'accuracy': result.get('accuracy'),
+        'fit_seconds': result.get('fit_seconds'),
+        'predict_seconds': result.get('predict_seconds'),
+    }
+    entry.update((key, result.get(key)) for key in PROFILE_KEYS)
+    entry.update(error=error, cached=cached)
+    return entry
+
+
+def evaluate_model(X_train, y_train, X_test, y_test, models, n_jobs=1, timeout=None, fit_cache=None, profile=True, deadline=None):
+    # Returns {name: {'status', 'accuracy', 'fit_seconds', 'predict_seconds', <PROFILE_KEYS>,
+    # 'error', 'cached'}} in the order of models, and fitted estimators replace the
+    # entries of models. profile=True adds single-row/batch latency, pickled size
+    # and peak batch memory per candidate (see profile_inference).
+    # With n_jobs > 1 (or a timeout) every model runs in its own process, so a
+    # model that raises, crashes or exceeds timeout seconds is reported as
+    # failed/timeout while the others still finish. deadline is an absolute
+    # time.monotonic() after which nothing new starts (status 'skipped') and
+    # running fits are stopped (status 'interrupted'), whatever their timeout.
+    # With a FitCache, models whose data and configuration were fitted before
+    # are loaded, not refitted.
     try:
         report = {}
-        for model_name, model in models.items():
-            model.fit(X_train, y_train)
-            y_test_pred = model.predict(X_test)
-            test_model_score = accuracy_score(y_test, y_test_pred)
-            report[model_name] = test_model_score
-        return report
+        cache_keys = {}
+        fitted = {}
+
+        def record_fit(model_name, result, cached=False):
+            models[model_name] = result['model']
+            fitted[model_name] = (result, cached)
+
+        def finalize():
+            # Profiled one model at a time after all fits finished, so the
+            # latencies are not skewed by other candidates training on the same cores
+            for model_name, (result, cached) in fitted.items():
+                needs_profile = profile and not all(key in result for key in PROFILE_KEYS)
+                if needs_profile:
+                    result.update(profile_inference(result['model'], X_test))
+                report[model_name] = _report_entry('ok', result, cached=cached)
+                if fit_cache is not None and (not cached or needs_profile):
+                    fit_cache.put(cache_keys[model_name], result)
+            return {model_name: report[model_name] for model_name in models}
+
+        if fit_cache is not None:
+            data_digest = fit_cache.data_digest(X_train, y_train, X_test, y_test)
+            for model_name, model in models.items():
+                cache_keys[model_name] = fit_cache.key(model, data_digest)
+                cached = fit_cache.get(cache_keys[model_name])
+                if cached is not None:
+                    record_fit(model_name, cached, cached=True)
+            logging.info(f'Fit cache: {len(fitted)} of {len(models)} models reused')
+
+        to_fit = [(model_name, model) for model_name, model in models.items() if model_name not in fitted]
+        cpus = os.cpu_count() or 1
+        n_jobs = max(1, min(n_jobs or cpus, len(to_fit)))
+        # Split the cores between concurrent fits instead of letting every
+        # model spin up a thread per core
+        threads = max(1, cpus // n_jobs)
+
+        if n_jobs == 1 and timeout is None and deadline is None:
+            for model_name, model in to_fit:
+                try:
+                    result = fit_and_score(model, X_train, y_train, X_test, y_test, threads)
+                except Exception as e:
+                    logging.info(f'{model_name} failed: {e}')
+                    report[model_name] = _report_entry('failed', error=f'{type(e).__name__}: {e}')
+                    continue
+                record_fit(model_name, result)
+            return finalize()
+
+        context = multiprocessing.get_context('fork' if 'fork' in multiprocessing.get_all_start_methods() else 'spawn')
+        pending = to_fit
+        running = {}
+
+        def finish(conn, model_name, process, outcome):
+            process.join(5)
+            if process.is_alive():
+                process.kill()
+            conn.close()
+            status, payload = outcome
+            if status == 'ok':
+                record_fit(model_name, payload)
+            else:
+                logging.info(f'{model_name} {status}: {payload}')
+                report[model_name] = _report_entry(status, error=payload)
+
+        deadline = float('inf') if deadline is None else deadline
+        while pending or running:
+            while pending and len(running) < n_jobs:
+                model_name, model = pending.pop(0)
+                if time.monotonic() >= deadline:
+                    logging.info(f'{model_name} skipped: deadline passed before it started')
+                    report[model_name] = _report_entry('skipped', error='deadline passed before it started')
+                    continue
+                parent_conn, child_conn = context.Pipe(duplex=False)
+                process = context.Process(target=_evaluate_in_child, daemon=True,
+                                          args=(child_conn, model, X_train, y_train, X_test, y_test, threads))
+                process.start()
+                child_conn.close()
+                started = time.monotonic()
+                stop_at = min(started + timeout if timeout else float('inf'), deadline)
+                running[parent_conn] = (model_name, process, started, stop_at)
+            if not running:
+                break
+
+            next_deadline = min(stop_at for _, _, _, stop_at in running.values())
+            wait_for = None if next_deadline == float('inf') else max(0.0, next_deadline - time.monotonic())
+            for conn in multiprocessing.connection.wait(list(running), timeout=wait_for):
+                model_name, process, _, _ = running.pop(conn)
+                try:
+                    outcome = conn.recv()
+                except EOFError:
+                    process.join(5)
+                    outcome = ('failed', f'worker exited with code {process.exitcode}')
+                finish(conn, model_name, process, outcome)
+
+            now = time.monotonic()
+            for conn, (model_name, process, started, stop_at) in list(running.items()):
+                if now >= stop_at:
+                    del running[conn]
+                    process.terminate()
+                    if timeout and now - started >= timeout:
+                        outcome = ('timeout', f'exceeded {timeout}s')
+                    else:
+                        outcome = ('interrupted', 'stopped at the deadline')
+                    finish(conn, model_name, process, outcome)
+
+        return finalize()
     except Exception as e:
         logging.info('Exception occurred during model training')
         raise customexception(e, sys)
-    
+
+
 def load_object(file_path):
     try:
         with open(file_path,'rb') as file_obj: